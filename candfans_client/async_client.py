@@ -4,13 +4,23 @@ import asyncio
 import os
 import json
 
-from typing import List, Optional, AsyncGenerator
+from contextvars import ContextVar
+from typing import (
+    Any, List, Optional, Sequence, AsyncGenerator, Awaitable, Callable, Dict, Iterable, Tuple, Type, TypeVar, Union
+)
 from urllib.parse import quote_plus, unquote
 
 import httpx
+from pydantic import BaseModel, ValidationError
 
 from candfans_client.models.sales import SalesHistory, Sales, SalesPurchasePost, SalesSubscribe, SalesChip, \
-    SalesBacknumber
+    SalesBacknumber, SalesReport
+from candfans_client.models.lazy import LazyModel
+from candfans_client.models.page import M, page_adapter
+from candfans_client.models.projection import projection
+from candfans_client.models.records import (
+    PostRecord, RankingCreatorRecord, SalesHistoryRecord, UserRecord, build_record, record_type
+)
 from candfans_client.models.search import RankingCreator, CreatorTerm, NewCommer
 from candfans_client.models.user import (
     User,
@@ -21,7 +31,22 @@ from candfans_client.models.timeline import (
     PostType,
     TimelineMonth,
 )
+from candfans_client.cache import ResponseCache
+from candfans_client.concurrency import abounded_map
+from candfans_client.decoder import JsonLoads, default_json_loads
 from candfans_client.exceptions import CandFansException
+from candfans_client.frame import COLUMNS, SalesHistoryFrame
+from candfans_client.intern import REPEATED_FIELDS, InternTable
+from candfans_client.pagination import aiter_pages, aprefetch_pages
+from candfans_client.ratelimit import RateLimiter
+from candfans_client.retry import RetryPolicy
+from candfans_client.session import AUTH_ERROR_STATUSES, SessionState
+from candfans_client.store import SalesStore, is_closed_month
+
+
+T = TypeVar('T')
+
+_logging_in: ContextVar[bool] = ContextVar('candfans_logging_in', default=False)
 
 
 class AsyncAnonymousCandFansClient:
@@ -31,11 +56,27 @@ class AsyncAnonymousCandFansClient:
         base_url: str = 'https://candfans.jp',
         ratelimit_reset_sec: int = 70,
         debug: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        json_loads: Optional[JsonLoads] = None,
+        intern_table: Optional[InternTable] = None,
     ):
 
         self._base_url = base_url
         self._session = httpx.AsyncClient(timeout=httpx.Timeout(5.0, read=20.0))
         self.ratelimit_reset_sec = ratelimit_reset_sec
+        self.rate_limiter = rate_limiter or RateLimiter(period=ratelimit_reset_sec)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.coalesce_requests = coalesce_requests
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._in_flight_waiters: Dict[asyncio.Future, int] = {}
+        self.json_loads = json_loads or default_json_loads()
+        # shares one instance of the strings repeated across a crawl
+        self.intern_table = intern_table
+        self._auth_generation = 0
         self.debug = debug
         if self.debug:
             import logging
@@ -63,72 +104,101 @@ class AsyncAnonymousCandFansClient:
         return base
 
     async def get_follows(
-            self, user_id: int, start_page: int = 1, max_page: int = 10
-    ) -> AsyncGenerator[User, None]:
+            self,
+            user_id: int,
+            start_page: int = 1,
+            max_page: int = 10,
+            concurrency: int = 1,
+            prefetch: int = 0,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> AsyncGenerator[Union[User, LazyModel[User], UserRecord, Tuple], None]:
         """
         https://candfans.jp/api/user/get-follow/1?page=1
         :return:
         """
-        page = start_page
-        while True:
+        async def fetch_page(page: int) -> List[Union[User, LazyModel[User], UserRecord, Tuple]]:
             try:
-                res_json = await self._get(
+                return await self._get_page(
                     f'api/user/get-follow/{user_id}?page={page}',
-                    headers=self.header
+                    User,
+                    headers=self.header,
+                    lazy=lazy,
+                    fields=fields,
+                    compact=compact
                 )
             except CandFansException as e:
                 raise CandFansException(
                     f'failed get follows of {user_id} page {page} [{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-
-            for f in res_json['data']:
-                yield User(**f)
 
-            page += 1
-            if page > max_page:
-                break
-            await asyncio.sleep(0.5)
+        pages = aiter_pages(fetch_page, start_page, max_page, concurrency)
+        async for users in aprefetch_pages(pages, prefetch):
+            for user in users:
+                yield user
 
     async def get_followed(
-            self, user_id: int, start_page: int = 1, max_page: int = 10
-    ) -> AsyncGenerator[User, None]:
+            self,
+            user_id: int,
+            start_page: int = 1,
+            max_page: int = 10,
+            concurrency: int = 1,
+            prefetch: int = 0,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> AsyncGenerator[Union[User, LazyModel[User], UserRecord, Tuple], None]:
         """
         https://candfans.jp/api/user/get-followed/1?page=1
         :return:
         """
-        page = start_page
-        while True:
+        async def fetch_page(page: int) -> List[Union[User, LazyModel[User], UserRecord, Tuple]]:
             try:
-                res_json = await self._get(
+                return await self._get_page(
                     f'api/user/get-followed/{user_id}?page={page}',
-                    headers=self.header
+                    User,
+                    headers=self.header,
+                    lazy=lazy,
+                    fields=fields,
+                    compact=compact
                 )
             except CandFansException as e:
                 raise CandFansException(
                     f'failed get followed of {user_id} page {page} [{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-            for f in res_json['data']:
-                yield User(**f)
-            page += 1
-            if page > max_page:
-                break
-            await asyncio.sleep(0.5)
+
+        pages = aiter_pages(fetch_page, start_page, max_page, concurrency)
+        async for users in aprefetch_pages(pages, prefetch):
+            for user in users:
+                yield user
 
     async def get_users(self, user_code: str) -> UserInfo:
+        user_info = self._cache_get('get_users', user_code)
+        if user_info is not None:
+            return user_info
         try:
             res_json = await self._get(
                 f'api/user/get-users?user_code={user_code}',
                 headers=self.header
             )
-            return UserInfo(**res_json['data'])
-        except CandFansException as e:
+            user_info = UserInfo(**res_json['data'])
+        except (CandFansException, ValidationError, KeyError, TypeError) as e:
             raise CandFansException(
                 f'failed get_users [{e}]'
             )
+        self._cache_set('get_users', user_code, user_info)
+        return user_info
+
+    async def get_users_many(
+            self, user_codes: Iterable[str], concurrency: int = 5
+    ) -> AsyncGenerator[Tuple[str, Union[UserInfo, CandFansException]], None]:
+        """
+        get_users() for every distinct code with at most `concurrency` requests in flight.
+        yields (user_code, UserInfo or the CandFansException of that code) as they complete.
+        """
+        async for user_code, user_info in abounded_map(self.get_users, dict.fromkeys(user_codes), concurrency):
+            yield user_code, user_info
 
     async def get_timeline(
             self,
@@ -137,7 +207,12 @@ class AsyncAnonymousCandFansClient:
             month: Optional[str] = None,
             start_page: int = 1,
             max_page: int = 10,
-    ) -> AsyncGenerator[Post, None]:
+            concurrency: int = 1,
+            prefetch: int = 0,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> AsyncGenerator[Union[Post, LazyModel[Post], PostRecord, Tuple], None]:
         """
         https://candfans.jp/api/contents/get-timeline?user_id=999&post_type[]=0&post_type[]=1
 
@@ -148,44 +223,49 @@ class AsyncAnonymousCandFansClient:
         ]
         :return:
         """
-        page = start_page
         post_types_str = '&'.join([p.query_str for p in post_types])
         query_param = f'user_id={user_id}&{post_types_str}'
         if month is not None:
             query_param += f'&month={month}'
 
-        while True:
+        async def fetch_page(page: int) -> List[Union[Post, LazyModel[Post], PostRecord, Tuple]]:
             try:
-                res_json = await self._get(
+                return await self._get_page(
                     f'api/contents/get-timeline?{query_param}&page={page}',
-                    headers=self.header
+                    Post,
+                    headers=self.header,
+                    lazy=lazy,
+                    fields=fields,
+                    compact=compact
                 )
             except CandFansException as e:
                 raise CandFansException(
                     f'failed get timeline of {query_param} page {page} [{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-            for p in res_json['data']:
-                yield Post(**p)
-            page += 1
-            if page > max_page:
-                break
-            await asyncio.sleep(0.5)
+
+        pages = aiter_pages(fetch_page, start_page, max_page, concurrency)
+        async for posts in aprefetch_pages(pages, prefetch):
+            for post in posts:
+                yield post
 
     async def get_creator_ranking(
         self,
         start_page: int = 1,
         max_page: int = 10,
         per_page: int = 10,
-        terms: CreatorTerm = CreatorTerm.DAILY
-    ) -> AsyncGenerator[RankingCreator, None]:
+        terms: CreatorTerm = CreatorTerm.DAILY,
+        concurrency: int = 1,
+        prefetch: int = 0,
+        compact: bool = False,
+    ) -> AsyncGenerator[Union[RankingCreator, RankingCreatorRecord], None]:
         """
         https://candfans.jp/api/v3/ranking/creator?page=1&per-page=10
         :return:
         """
-        page = start_page
-        while True:
+        async def fetch_page(page: int) -> List[Union[RankingCreator, RankingCreatorRecord]]:
+            creators = self._cache_get('get_creator_ranking', (page, per_page, terms, compact))
+            if creators is not None:
+                return creators
             try:
                 res_json = await self._v3_request(
                     'GET',
@@ -196,38 +276,44 @@ class AsyncAnonymousCandFansClient:
                 raise CandFansException(
                     f'failed get ranking page {page} per-page {per_page} [{e}]'
                 )
-            if len(res_json['ranking']) == 0:
-                break
-            for f in res_json['ranking']:
-                user = f['user']
-                yield RankingCreator(
+            creators = self._build_items(RankingCreator, [
+                dict(
                     rank=f['rank'],
-                    user_id=user['id'],
-                    user_code=user['code'],
-                    username=user['name'],
-                    profile_cover_path=user['profile_cover_path'],
-                    profile_icon_path=user['profile_icon_path'],
-                    profile_text=user['profile_text'],
+                    user_id=f['user']['id'],
+                    user_code=f['user']['code'],
+                    username=f['user']['name'],
+                    profile_cover_path=f['user']['profile_cover_path'],
+                    profile_icon_path=f['user']['profile_icon_path'],
+                    profile_text=f['user']['profile_text'],
                 )
-            page += 1
-            if page > max_page:
-                break
-            await asyncio.sleep(0.5)
+                for f in res_json['ranking']
+            ], compact=compact)
+            self._cache_set('get_creator_ranking', (page, per_page, terms, compact), creators)
+            return creators
+
+        pages = aiter_pages(fetch_page, start_page, max_page, concurrency)
+        async for creators in aprefetch_pages(pages, prefetch):
+            for creator in creators:
+                yield creator
 
     async def get_trend_new_commers(
             self,
             start_page: int = 1,
             max_page: int = 10,
-            per_page: int = 10
+            per_page: int = 10,
+            concurrency: int = 1,
+            prefetch: int = 0,
     ) -> AsyncGenerator[NewCommer, None]:
         """
         https://candfans.jp/api/v3/creators/trend-newcomers?page=1&per-page=10
         :return:
         """
-        page = start_page
-        while True:
+        async def fetch_page(page: int) -> List[NewCommer]:
+            new_commers = self._cache_get('get_trend_new_commers', (page, per_page))
+            if new_commers is not None:
+                return new_commers
             try:
-                res_json = self._v3_request(
+                res_json = await self._v3_request(
                     'GET',
                     f'api/v3/creators/trend-newcomers?page={page}&per-page={per_page}',
                     headers=self.header
@@ -236,10 +322,8 @@ class AsyncAnonymousCandFansClient:
                 raise CandFansException(
                     f'failed get ranking page {page} per-page {per_page} [{e}]'
                 )
-            if len(res_json['creators']) == 0:
-                break
-            for f in res_json['creators']:
-                yield NewCommer(
+            new_commers = [
+                NewCommer(
                     user_id=f['id'],
                     user_code=f['code'],
                     username=f['name'],
@@ -249,11 +333,53 @@ class AsyncAnonymousCandFansClient:
                     profile_icon_path=f['profile_icon_path'],
                     profile_text=f['profile_text'],
                 )
+                for f in res_json['creators']
+            ]
+            self._cache_set('get_trend_new_commers', (page, per_page), new_commers)
+            return new_commers
+
+        pages = aiter_pages(fetch_page, start_page, max_page, concurrency)
+        async for new_commers in aprefetch_pages(pages, prefetch):
+            for new_commer in new_commers:
+                yield new_commer
 
-            page += 1
-            if page > max_page:
-                break
-            await asyncio.sleep(0.5)
+    def _build_items(
+            self,
+            model: Type[M],
+            items: List[Dict[str, Any]],
+            lazy: bool = False,
+            fields: Optional[Tuple[str, ...]] = None,
+            compact: bool = False,
+    ) -> List[M]:
+        """
+        Models by default, otherwise in order of precedence namedtuples of just `fields`,
+        compact records or LazyModel views.
+        """
+        self._intern(model, items)
+        if fields is not None:
+            return list(map(projection(model, fields), items))
+        if compact:
+            record = record_type(model)
+            return [build_record(record, item) for item in items]
+        if lazy:
+            return [LazyModel(model, item) for item in items]
+        return [model(**item) for item in items]
+
+    def _intern(self, model: Type[BaseModel], items: Iterable[Dict[str, Any]]) -> None:
+        fields = REPEATED_FIELDS.get(model)
+        if self.intern_table is None or fields is None:
+            return
+        for item in items:
+            self.intern_table.intern_fields(item, fields)
+
+    def _cache_get(self, endpoint: str, key):
+        if self.cache is None:
+            return None
+        return self.cache.get(endpoint, key)
+
+    def _cache_set(self, endpoint: str, key, value) -> None:
+        if self.cache is not None:
+            self.cache.set(endpoint, key, value)
 
     async def _post(self, path: str, *arg, **kwargs):
         return await self._request('POST', path, *arg, **kwargs)
@@ -264,16 +390,148 @@ class AsyncAnonymousCandFansClient:
     async def _put(self, path: str, *arg, **kwargs):
         return await self._request('PUT', path, *arg, **kwargs)
 
+    async def _send(self, method: str, url: str, *arg, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                if delay >= 1 or self.debug:
+                    print(f'reach ratelimit. waiting {delay:.1f}s')
+                await asyncio.sleep(delay)
+            try:
+                response = await self._session.request(method, url, *arg, **kwargs)
+            except httpx.TransportError as e:
+                if not self.retry_policy.should_retry(method, attempt, error=e):
+                    raise CandFansException(f'failed {method} for {url} [{e!r}]') from e
+                await asyncio.sleep(self.retry_policy.backoff(attempt))
+                continue
+            self.rate_limiter.update(response.headers)
+            if self.retry_policy.should_retry(method, attempt, response=response):
+                if self.debug:
+                    print(f'retry {method} for {url} status [{response.status_code}] attempt {attempt}')
+                await asyncio.sleep(self.retry_policy.backoff(attempt, response))
+                continue
+            return response
+
+    async def _send_authenticated(self, method: str, url: str, *arg, **kwargs) -> httpx.Response:
+        generation = self._auth_generation
+        response = await self._send(method, url, *arg, **kwargs)
+        if response.status_code in AUTH_ERROR_STATUSES and await self._reauthenticate(generation):
+            kwargs['headers'] = self.header
+            response = await self._send(method, url, *arg, **kwargs)
+        return response
+
+    async def _reauthenticate(self, generation: int) -> bool:
+        return False
+
     async def _request(self, method: str, path: str, *arg, **kwargs):
+        if method != 'GET' or not self.coalesce_requests:
+            return await self._perform_request(method, path, *arg, **kwargs)
+        return await self._single_flight(
+            ('request', path), lambda: self._perform_request(method, path, *arg, **kwargs)
+        )
+
+    async def _v3_request(self, method: str, path: str, *arg, **kwargs):
+        if method != 'GET' or not self.coalesce_requests:
+            return await self._perform_v3_request(method, path, *arg, **kwargs)
+        return await self._single_flight(
+            ('v3_request', path), lambda: self._perform_v3_request(method, path, *arg, **kwargs)
+        )
+
+    async def _get_page(
+            self,
+            path: str,
+            model: Type[M],
+            *arg,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+            **kwargs
+    ) -> List[M]:
+        fields = None if fields is None else tuple(fields)
+        if not self.coalesce_requests:
+            return await self._perform_get_page(
+                path, model, *arg, lazy=lazy, fields=fields, compact=compact, **kwargs
+            )
+        # the same page built differently is a different result
+        return await self._single_flight(
+            (f'page:{lazy}:{compact}:{fields}', path),
+            lambda: self._perform_get_page(path, model, *arg, lazy=lazy, fields=fields, compact=compact, **kwargs)
+        )
+
+    async def _single_flight(self, key: Tuple[str, str], perform: Callable[[], Awaitable[T]]) -> T:
+        """
+        Identical GETs issued while one is in flight share its response instead of sending their own.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(perform())
+            self._in_flight[key] = task
+
+            def forget(done: asyncio.Future):
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+
+            task.add_done_callback(forget)
+        # one caller being cancelled must not cancel the request the others are waiting for
+        waiters = self._in_flight_waiters
+        waiters[task] = waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters[task] -= 1
+            if not waiters[task]:
+                del waiters[task]
+                # but once every caller is gone nobody needs it anymore
+                if not task.done():
+                    # later callers must start afresh rather than join the cancelled request
+                    if self._in_flight.get(key) is task:
+                        del self._in_flight[key]
+                    task.cancel()
+
+    async def _perform_request(self, method: str, path: str, *arg, **kwargs):
         url = f'{self.base_url}/{path}'
-        response = await self._session.request(method, url, *arg, **kwargs)
-        ratelimit_remaining = response.headers.get("x-ratelimit-remaining")
+        response = await self._send_authenticated(method, url, *arg, **kwargs)
+        return self._decode_response(method, path, url, response)
 
-        if ratelimit_remaining is not None and int(ratelimit_remaining) <= 10:
-            print(f'reach ratelimit {ratelimit_remaining}. waiting {self.ratelimit_reset_sec}s')
-            await asyncio.sleep(self.ratelimit_reset_sec)
+    async def _perform_get_page(
+            self,
+            path: str,
+            model: Type[M],
+            *arg,
+            lazy: bool = False,
+            fields: Optional[Tuple[str, ...]] = None,
+            compact: bool = False,
+            **kwargs
+    ) -> List[M]:
+        """
+        GET a page envelope and validate its data straight from the response bytes.
+        With lazy, fields or compact the items are built from the decoded dicts instead, see _build_items.
+        """
+        url = f'{self.base_url}/{path}'
+        response = await self._send_authenticated('GET', url, *arg, **kwargs)
+        if not self.debug and not lazy and not compact and fields is None:
+            try:
+                page = page_adapter(model).validate_json(response.content)
+            except ValidationError:
+                page = None
+            if page is not None and page.status == 'SUCCESS':
+                self._intern(model, [item.__dict__ for item in page.data])
+                return page.data
+        # failures and debug dumps take the dict path for its error reporting
+        response_json = self._decode_response('GET', path, url, response)
+        return self._build_items(model, response_json['data'], lazy, fields, compact)
+
+    def _decode_response(self, method: str, path: str, url: str, response: httpx.Response):
+        ratelimit_remaining = response.headers.get("x-ratelimit-remaining")
 
-        response_json = response.json()
+        try:
+            response_json = self.json_loads(response.content)
+        except ValueError:
+            raise CandFansException(
+                f'failed {method} for {path} status [{response.status_code}] invalid json'
+            )
 
         if self.debug:
             print(f'[{ratelimit_remaining=}]')
@@ -293,15 +551,17 @@ class AsyncAnonymousCandFansClient:
             )
         return response_json
 
-    async def _v3_request(self, method: str, path: str, *arg, **kwargs):
+    async def _perform_v3_request(self, method: str, path: str, *arg, **kwargs):
         url = f'{self.base_url}/{path}'
-        response = await self._session.request(method, url, *arg, **kwargs)
-        response_json = response.json()
+        response = await self._send_authenticated(method, url, *arg, **kwargs)
         ratelimit_remaining = response.headers.get("x-ratelimit-remaining")
 
-        if ratelimit_remaining is not None and int(ratelimit_remaining) <= 10:
-            print(f'reach ratelimit {ratelimit_remaining}. waiting {self.ratelimit_reset_sec}s')
-            await asyncio.sleep(self.ratelimit_reset_sec)
+        try:
+            response_json = self.json_loads(response.content)
+        except ValueError:
+            raise CandFansException(
+                f'failed {method} for {path} status [{response.status_code}] invalid json'
+            )
 
         if self.debug:
             print(f'[{ratelimit_remaining=}]')
@@ -320,13 +580,27 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
         password: str,
         base_url: str = 'https://candfans.jp',
         ratelimit_reset_sec: int = 70,
-        debug: bool = False
+        debug: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        sales_store: Optional[SalesStore] = None,
+        session_path: Optional[str] = None,
+        coalesce_requests: bool = True,
+        json_loads: Optional[JsonLoads] = None,
+        intern_table: Optional[InternTable] = None,
     ) -> None:
-        super().__init__(base_url, ratelimit_reset_sec, debug)
+        super().__init__(
+            base_url, ratelimit_reset_sec, debug, rate_limiter, retry_policy, cache, coalesce_requests, json_loads,
+            intern_table,
+        )
         self._email = email
         self._password = password
+        self.sales_store = sales_store
+        self.session_path = session_path
         self._xsrf_token = None
-        self.logged_in = False
+        self._auth_lock = None
+        self.logged_in = session_path is not None and self.load_session(session_path)
 
     @property
     def header(self):
@@ -341,8 +615,8 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
         return base
 
     async def login(self) -> bool:
-        cookies = await self._get_csrf_cookies()
-        self._xsrf_token = unquote(cookies['XSRF-TOKEN'])
+        await self._refresh_xsrf_token()
+        logging_in = _logging_in.set(True)
         try:
             res = await self._post(
                 'api/auth/login',
@@ -352,49 +626,137 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
                 },
                 headers=self.header,
             )
+            self._auth_generation += 1
+            # logging in rotates the token, the jar holds the new one
+            self._sync_xsrf_token()
+            if self.session_path is not None:
+                self.save_session(self.session_path)
             self.logged_in = True
             return True
         except CandFansException as e:
             raise e
+        finally:
+            _logging_in.reset(logging_in)
 
-    async def get_sales_history(self, month_yyyy_mm: str) -> List[SalesHistory]:
+    def save_session(self, path: str) -> None:
+        self._sync_xsrf_token()
+        SessionState.capture(self._session.cookies, self._xsrf_token).save(path)
+
+    def load_session(self, path: str) -> bool:
+        """
+        Restore a session saved by save_session without logging in.
+        It is not verified here, the first request rejected as unauthenticated logs in again.
+        """
+        state = SessionState.load(path)
+        if state is None or not state.xsrf_token:
+            return False
+        state.apply(self._session.cookies)
+        self._xsrf_token = state.xsrf_token
+        return True
+
+    async def _reauthenticate(self, generation: int) -> bool:
+        """
+        Log in again after a request was rejected as unauthenticated, so that it can be replayed.
+        Requests rejected concurrently share a single login.
+        """
+        if _logging_in.get():
+            # the login request itself has been rejected
+            return False
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if generation == self._auth_generation:
+                await self.login()
+        return True
+
+    async def get_sales_history(
+            self,
+            month_yyyy_mm: str,
+            refresh: bool = False,
+            concurrency: int = 1,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> List[Union[SalesHistory, SalesHistoryRecord, Tuple]]:
         """
         https://candfans.jp/api/orders/get-sales-history?month=2023-12&page=1
         :return:
         """
-        histories = []
-        page = 1
-        while True:
+        return [h async for h in self.iter_sales_history(month_yyyy_mm, refresh, concurrency, fields, compact)]
+
+    async def iter_sales_history(
+            self,
+            month_yyyy_mm: str,
+            refresh: bool = False,
+            concurrency: int = 1,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> AsyncGenerator[Union[SalesHistory, SalesHistoryRecord, Tuple], None]:
+        """
+        Yield the sales history of a month page by page, without holding the whole month in memory.
+        The month is saved to sales_store only once every page has been read.
+        With concurrency > 1 up to that many pages are fetched ahead at once and yielded in page order.
+        With fields only those fields are yielded as namedtuples, with compact=True SalesHistoryRecord.
+        """
+        fields = None if fields is None else tuple(fields)
+        histories = self._load_sales('get_sales_history', month_yyyy_mm, refresh)
+        if histories is not None:
+            for history in self._build_items(SalesHistory, histories, fields=fields, compact=compact):
+                yield history
+            return
+
+        # raw rows are only kept around when they are going to be stored
+        raw = [] if self.sales_store is not None and is_closed_month(month_yyyy_mm) else None
+
+        async def fetch_page(page: int) -> List[Union[dict, SalesHistory, SalesHistoryRecord, Tuple]]:
+            path = f'api/orders/get-sales-history?month={month_yyyy_mm}&page={page}'
+            try:
+                if raw is None:
+                    return await self._get_page(
+                        path, SalesHistory, headers=self.header, fields=fields, compact=compact
+                    )
+                res_json = await self._get(path, headers=self.header)
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales history for month {month_yyyy_mm} page {page} [{e}]'
+                )
+            return res_json['data']
+
+        async for rows in aiter_pages(fetch_page, concurrency=concurrency):
+            if raw is not None:
+                raw += rows
+                rows = self._build_items(SalesHistory, rows, fields=fields, compact=compact)
+            for history in rows:
+                yield history
+        if raw is not None:
+            self._save_sales('get_sales_history', month_yyyy_mm, raw)
+
+    async def get_sales_history_frame(
+            self, month_yyyy_mm: str, refresh: bool = False, concurrency: int = 1
+    ) -> SalesHistoryFrame:
+        """
+        The sales history of a month as a columnar SalesHistoryFrame, built without models.
+        Requires numpy.
+        """
+        rows = [r async for r in self.iter_sales_history(month_yyyy_mm, refresh, concurrency, COLUMNS)]
+        return SalesHistoryFrame.from_rows(rows)
+
+    async def get_sales(self, month_yyyy_mm: str, refresh: bool = False) -> List[Sales]:
+        data = self._load_sales('get_sales', month_yyyy_mm, refresh)
+        if data is None:
             try:
                 res_json = await self._get(
-                    f'api/orders/get-sales-history?month={month_yyyy_mm}&page={page}',
+                    f'api/orders/get-sales?month={month_yyyy_mm}',
                     headers=self.header
                 )
             except CandFansException as e:
                 raise CandFansException(
-                    f'failed get sales history for month {month_yyyy_mm} page {page} [{e}]'
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-            histories += res_json['data']
-            await asyncio.sleep(0.5)
-
-            page += 1
-        return [SalesHistory(**h) for h in histories]
-
-    async def get_sales(self, month_yyyy_mm: str) -> List[Sales]:
-        try:
-            res_json = await self._get(
-                f'api/orders/get-sales?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return [Sales(**s) for s in res_json['data']]
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+            data = res_json['data']
+            self._save_sales('get_sales', month_yyyy_mm, data)
+        return [Sales(**s) for s in data]
 
-    async def get_sales_purchase_post(self, month_yyyy_mm: str) -> SalesPurchasePost:
+    async def get_sales_purchase_post(self, month_yyyy_mm: str, refresh: bool = False) -> SalesPurchasePost:
         """
         {
           "status": "SUCCESS",
@@ -420,18 +782,22 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = await self._get(
-                f'api/orders/get-sales-purchasepost?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesPurchasePost(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_purchase_post', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = await self._get(
+                    f'api/orders/get-sales-purchasepost?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_purchase_post', month_yyyy_mm, data)
+        return SalesPurchasePost(**data)
 
-    async def get_sales_subscribe(self, month_yyyy_mm: str) -> SalesSubscribe:
+    async def get_sales_subscribe(self, month_yyyy_mm: str, refresh: bool = False) -> SalesSubscribe:
         """
         {
           "status": "SUCCESS",
@@ -454,18 +820,22 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = await self._get(
-                f'api/orders/get-sales-subscribe?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesSubscribe(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_subscribe', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = await self._get(
+                    f'api/orders/get-sales-subscribe?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_subscribe', month_yyyy_mm, data)
+        return SalesSubscribe(**data)
 
-    async def get_sales_chip(self, month_yyyy_mm: str) -> SalesChip:
+    async def get_sales_chip(self, month_yyyy_mm: str, refresh: bool = False) -> SalesChip:
         """
         {
           "status": "SUCCESS",
@@ -483,18 +853,22 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = await self._get(
-                f'api/orders/get-sales-chip?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesChip(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_chip', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = await self._get(
+                    f'api/orders/get-sales-chip?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_chip', month_yyyy_mm, data)
+        return SalesChip(**data)
 
-    async def get_sales_backnumber(self, month_yyyy_mm: str) -> SalesBacknumber:
+    async def get_sales_backnumber(self, month_yyyy_mm: str, refresh: bool = False) -> SalesBacknumber:
         """
         {
           "status": "SUCCESS",
@@ -513,16 +887,54 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
           }
         }
         """
+        data = self._load_sales('get_sales_backnumber', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = await self._get(
+                    f'api/orders/get-sales-backnumber?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_backnumber', month_yyyy_mm, data)
+        return SalesBacknumber(**data)
+
+    async def get_sales_report(
+            self, months: Iterable[str], concurrency: int = 4, refresh: bool = False
+    ) -> Dict[str, SalesReport]:
+        """
+        Fetch every sales endpoint for each month, at most `concurrency` requests at once.
+        :return: {month_yyyy_mm: SalesReport}
+        """
+        months = list(dict.fromkeys(months))
+        endpoints = {
+            'sales': self.get_sales,
+            'purchase_post': self.get_sales_purchase_post,
+            'subscribe': self.get_sales_subscribe,
+            'chip': self.get_sales_chip,
+            'backnumber': self.get_sales_backnumber,
+            'histories': self.get_sales_history,
+        }
+
+        async def fetch(job: Tuple[str, str]):
+            month, field = job
+            return await endpoints[field](month, refresh=refresh)
+
+        jobs = [(month, field) for month in months for field in endpoints]
+        bundles: Dict[str, Dict[str, Any]] = {month: {} for month in months}
+        results = abounded_map(fetch, jobs, concurrency)
         try:
-            res_json = await self._get(
-                f'api/orders/get-sales-backnumber?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesBacknumber(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+            async for (month, field), result in results:
+                if isinstance(result, CandFansException):
+                    raise result
+                bundles[month][field] = result
+        finally:
+            # cancel the jobs still in flight now rather than whenever the generator is finalized
+            await results.aclose()
+        return {month: SalesReport(month=month, **bundles[month]) for month in months}
 
     async def get_user_mine(self) -> MineUserInfo:
         """
@@ -545,8 +957,7 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
 
     async def follow(self, user_id: int) -> FollowStatus:
         try:
-            cookies = await self._get_csrf_cookies()
-            self._xsrf_token = unquote(cookies['XSRF-TOKEN'])
+            await self._ensure_xsrf_token()
             res_json = await self._put(
                 f'api/user/put-follow/{user_id}',
                 headers=self.header
@@ -561,8 +972,45 @@ class AsyncCandFansClient(AsyncAnonymousCandFansClient):
                 f'failed follow of [{user_id}] [{e}]'
             )
 
+    async def follow_many(
+            self, user_ids: Iterable[int], concurrency: int = 5
+    ) -> AsyncGenerator[Tuple[int, Union[FollowStatus, CandFansException]], None]:
+        """
+        follow() every user with at most `concurrency` requests in flight.
+        yields (user_id, FollowStatus or the CandFansException of that user) as they complete.
+        """
+        await self._ensure_xsrf_token()
+        async for user_id, status in abounded_map(self.follow, user_ids, concurrency):
+            yield user_id, status
+
+    def _load_sales(self, endpoint: str, month_yyyy_mm: str, refresh: bool):
+        if self.sales_store is None or refresh or not is_closed_month(month_yyyy_mm):
+            return None
+        return self.sales_store.get(endpoint, month_yyyy_mm)
+
+    def _save_sales(self, endpoint: str, month_yyyy_mm: str, data) -> None:
+        if self.sales_store is not None and is_closed_month(month_yyyy_mm):
+            self.sales_store.set(endpoint, month_yyyy_mm, data)
+
+    async def _ensure_xsrf_token(self) -> None:
+        self._sync_xsrf_token()
+        if self._xsrf_token is None:
+            await self._refresh_xsrf_token()
+
+    def _sync_xsrf_token(self) -> None:
+        """
+        Take the XSRF token from the cookie jar, which every response keeps current.
+        """
+        token = self._session.cookies.get('XSRF-TOKEN')
+        if token:
+            self._xsrf_token = unquote(token)
+
+    async def _refresh_xsrf_token(self) -> None:
+        cookies = await self._get_csrf_cookies()
+        self._xsrf_token = unquote(cookies['XSRF-TOKEN'])
+
     async def _get_csrf_cookies(self):
         url = f'{self._base_url}/api/sanctum/csrf-cookie'
-        res = await self._session.get(url)
+        res = await self._send('GET', url)
         cookies = res.cookies
         return cookies
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """
+    LRU cache of already validated responses with a TTL per endpoint.
+
+    endpoint is the client method name (e.g. 'get_users'), ttls overrides the default ttl for it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        ttls: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, Hashable], Tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, endpoint: str, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((endpoint, key))
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[(endpoint, key)]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end((endpoint, key))
+            self.stats.hits += 1
+            return value
+
+    def set(self, endpoint: str, key: Hashable, value: Any) -> None:
+        ttl = self.ttls.get(endpoint, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(endpoint, key)] = (self._clock() + ttl, value)
+            self._entries.move_to_end((endpoint, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import threading
 import time
 import os
 import json
 
-from typing import List, Optional, Generator
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Generator, Iterable, Tuple, Type, Union
 from urllib.parse import unquote, quote_plus
 
 import httpx
+from pydantic import BaseModel, ValidationError
 
 from candfans_client.models.sales import (
     Sales,
@@ -17,6 +20,12 @@ from candfans_client.models.sales import (
     SalesChip,
     SalesBacknumber
 )
+from candfans_client.models.lazy import LazyModel
+from candfans_client.models.page import M, page_adapter
+from candfans_client.models.projection import projection
+from candfans_client.models.records import (
+    PostRecord, RankingCreatorRecord, SalesHistoryRecord, UserRecord, build_record, record_type
+)
 from candfans_client.models.search import RankingCreator, CreatorTerm, NewCommer
 from candfans_client.models.user import (
     User,
@@ -29,15 +38,45 @@ from candfans_client.models.timeline import (
     PostType,
 )
 
+from candfans_client.cache import ResponseCache
+from candfans_client.concurrency import bounded_map
+from candfans_client.decoder import JsonLoads, default_json_loads
 from candfans_client.exceptions import CandFansException
+from candfans_client.frame import COLUMNS, SalesHistoryFrame
+from candfans_client.intern import REPEATED_FIELDS, InternTable
+from candfans_client.pagination import iter_pages, prefetch_pages
+from candfans_client.ratelimit import RateLimiter
+from candfans_client.retry import RetryPolicy
+from candfans_client.session import AUTH_ERROR_STATUSES, SessionState
+from candfans_client.store import SalesStore, is_closed_month
+
+
+_logging_in: ContextVar[bool] = ContextVar('candfans_logging_in', default=False)
 
 
 class AnonymousCandFansClient:
-    def __init__(self, base_url: str = 'https://candfans.jp', ratelimit_reset_sec=70, debug: bool = False):
+    def __init__(
+        self,
+        base_url: str = 'https://candfans.jp',
+        ratelimit_reset_sec=70,
+        debug: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        json_loads: Optional[JsonLoads] = None,
+        intern_table: Optional[InternTable] = None,
+    ):
 
         self._base_url = base_url
         self._session = httpx.Client(timeout=httpx.Timeout(5.0, read=20.0))
         self.ratelimit_reset_sec = ratelimit_reset_sec
+        self.rate_limiter = rate_limiter or RateLimiter(period=ratelimit_reset_sec)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.json_loads = json_loads or default_json_loads()
+        # shares one instance of the strings repeated across a crawl
+        self.intern_table = intern_table
+        self._auth_generation = 0
         self.debug = debug
         if self.debug:
             import logging
@@ -63,69 +102,99 @@ class AnonymousCandFansClient:
         }
         return base
 
-    def get_follows(self, user_id: int, start_page: int = 1, max_page: int = 10) -> Generator[User, None, None]:
+    def get_follows(
+            self,
+            user_id: int,
+            start_page: int = 1,
+            max_page: int = 10,
+            prefetch: int = 0,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> Generator[Union[User, LazyModel[User], UserRecord, Tuple], None, None]:
         """
         https://candfans.jp/api/user/get-follow/1?page=1
         :return:
         """
-        page = start_page
-        while True:
+        def fetch_page(page: int) -> List[Union[User, LazyModel[User], UserRecord, Tuple]]:
             try:
-                res_json = self._get(
+                return self._get_page(
                     f'api/user/get-follow/{user_id}?page={page}',
-                    headers=self.header
+                    User,
+                    headers=self.header,
+                    lazy=lazy,
+                    fields=fields,
+                    compact=compact
                 )
             except CandFansException as e:
                 raise CandFansException(
                     f'failed get follows of {user_id} page {page} [{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-
-            for f in res_json['data']:
-                yield User(**f)
 
-            page += 1
-            if page > max_page:
-                break
-            time.sleep(0.5)
+        pages = iter_pages(fetch_page, start_page, max_page)
+        for users in prefetch_pages(pages, prefetch):
+            for user in users:
+                yield user
 
-    def get_followed(self, user_id: int, start_page: int = 1, max_page: int = 10) -> Generator[User, None, None]:
+    def get_followed(
+            self,
+            user_id: int,
+            start_page: int = 1,
+            max_page: int = 10,
+            prefetch: int = 0,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> Generator[Union[User, LazyModel[User], UserRecord, Tuple], None, None]:
         """
         https://candfans.jp/api/user/get-followed/1?page=1
         :return:
         """
-        page = start_page
-        while True:
+        def fetch_page(page: int) -> List[Union[User, LazyModel[User], UserRecord, Tuple]]:
             try:
-                res_json = self._get(
+                return self._get_page(
                     f'api/user/get-followed/{user_id}?page={page}',
-                    headers=self.header
+                    User,
+                    headers=self.header,
+                    lazy=lazy,
+                    fields=fields,
+                    compact=compact
                 )
             except CandFansException as e:
                 raise CandFansException(
                     f'failed get followed of {user_id} page {page} [{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-            for f in res_json['data']:
-                yield User(**f)
-            page += 1
-            if page > max_page:
-                break
-            time.sleep(0.5)
+
+        pages = iter_pages(fetch_page, start_page, max_page)
+        for users in prefetch_pages(pages, prefetch):
+            for user in users:
+                yield user
 
     def get_users(self, user_code: str) -> UserInfo:
+        user_info = self._cache_get('get_users', user_code)
+        if user_info is not None:
+            return user_info
         try:
             res_json = self._get(
                 f'api/user/get-users?user_code={user_code}',
                 headers=self.header
             )
-            return UserInfo(**res_json['data'])
-        except CandFansException as e:
+            user_info = UserInfo(**res_json['data'])
+        except (CandFansException, ValidationError, KeyError, TypeError) as e:
             raise CandFansException(
                 f'failed get_users [{e}]'
             )
+        self._cache_set('get_users', user_code, user_info)
+        return user_info
+
+    def get_users_many(
+            self, user_codes: Iterable[str], concurrency: int = 5
+    ) -> Generator[Tuple[str, Union[UserInfo, CandFansException]], None, None]:
+        """
+        get_users() for every distinct code on up to `concurrency` threads.
+        yields (user_code, UserInfo or the CandFansException of that code) as they complete.
+        """
+        yield from bounded_map(self.get_users, dict.fromkeys(user_codes), concurrency)
 
     def get_timeline(
             self,
@@ -134,7 +203,11 @@ class AnonymousCandFansClient:
             month: Optional[str] = None,
             start_page: int = 1,
             max_page: int = 10,
-    ) -> Generator[Post, None, None]:
+            prefetch: int = 0,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> Generator[Union[Post, LazyModel[Post], PostRecord, Tuple], None, None]:
         """
         https://candfans.jp/api/contents/get-timeline?user_id=999&post_type[]=0&post_type[]=1
 
@@ -145,44 +218,48 @@ class AnonymousCandFansClient:
         ]
         :return:
         """
-        page = start_page
         post_types_str = '&'.join([p.query_str for p in post_types])
         query_param = f'user_id={user_id}&{post_types_str}'
         if month is not None:
             query_param += f'&month={month}'
 
-        while True:
+        def fetch_page(page: int) -> List[Union[Post, LazyModel[Post], PostRecord, Tuple]]:
             try:
-                res_json = self._get(
+                return self._get_page(
                     f'api/contents/get-timeline?{query_param}&page={page}',
-                    headers=self.header
+                    Post,
+                    headers=self.header,
+                    lazy=lazy,
+                    fields=fields,
+                    compact=compact
                 )
             except CandFansException as e:
                 raise CandFansException(
                     f'failed get timeline of {query_param} page {page} [{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-            for p in res_json['data']:
-                yield Post(**p)
-            page += 1
-            if page > max_page:
-                break
-            time.sleep(0.5)
+
+        pages = iter_pages(fetch_page, start_page, max_page)
+        for posts in prefetch_pages(pages, prefetch):
+            for post in posts:
+                yield post
 
     def get_creator_ranking(
         self,
         start_page: int = 1,
         max_page: int = 10,
         per_page: int = 10,
-        terms: CreatorTerm = CreatorTerm.DAILY
-    ) -> Generator[RankingCreator, None, None]:
+        terms: CreatorTerm = CreatorTerm.DAILY,
+        prefetch: int = 0,
+        compact: bool = False,
+    ) -> Generator[Union[RankingCreator, RankingCreatorRecord], None, None]:
         """
         https://candfans.jp/api/v3/ranking/creator?page=1&per-page=10&terms=DAILY
         :return:
         """
-        page = start_page
-        while True:
+        def fetch_page(page: int) -> List[Union[RankingCreator, RankingCreatorRecord]]:
+            creators = self._cache_get('get_creator_ranking', (page, per_page, terms, compact))
+            if creators is not None:
+                return creators
             try:
                 res_json = self._v3_request(
                     'GET',
@@ -193,36 +270,41 @@ class AnonymousCandFansClient:
                 raise CandFansException(
                     f'failed get ranking page {page} per-page {per_page} [{e}]'
                 )
-            if len(res_json['ranking']) == 0:
-                break
-            for f in res_json['ranking']:
-                user = f['user']
-                yield RankingCreator(
+            creators = self._build_items(RankingCreator, [
+                dict(
                     rank=f['rank'],
-                    user_id=user['id'],
-                    user_code=user['code'],
-                    username=user['name'],
-                    profile_cover_path=user['profile_cover_path'],
-                    profile_icon_path=user['profile_icon_path'],
-                    profile_text=user['profile_text'],
+                    user_id=f['user']['id'],
+                    user_code=f['user']['code'],
+                    username=f['user']['name'],
+                    profile_cover_path=f['user']['profile_cover_path'],
+                    profile_icon_path=f['user']['profile_icon_path'],
+                    profile_text=f['user']['profile_text'],
                 )
-            page += 1
-            if page > max_page:
-                break
-            time.sleep(0.5)
+                for f in res_json['ranking']
+            ], compact=compact)
+            self._cache_set('get_creator_ranking', (page, per_page, terms, compact), creators)
+            return creators
+
+        pages = iter_pages(fetch_page, start_page, max_page)
+        for creators in prefetch_pages(pages, prefetch):
+            for creator in creators:
+                yield creator
 
     def get_trend_new_commers(
             self,
             start_page: int = 1,
             max_page: int = 10,
-            per_page: int = 10
+            per_page: int = 10,
+            prefetch: int = 0,
     ) -> Generator[NewCommer, None, None]:
         """
         https://candfans.jp/api/v3/creators/trend-newcomers?page=1&per-page=10
         :return:
         """
-        page = start_page
-        while True:
+        def fetch_page(page: int) -> List[NewCommer]:
+            new_commers = self._cache_get('get_trend_new_commers', (page, per_page))
+            if new_commers is not None:
+                return new_commers
             try:
                 res_json = self._v3_request(
                     'GET',
@@ -233,10 +315,8 @@ class AnonymousCandFansClient:
                 raise CandFansException(
                     f'failed get ranking page {page} per-page {per_page} [{e}]'
                 )
-            if len(res_json['creators']) == 0:
-                break
-            for f in res_json['creators']:
-                yield NewCommer(
+            new_commers = [
+                NewCommer(
                     user_id=f['id'],
                     user_code=f['code'],
                     username=f['name'],
@@ -246,11 +326,53 @@ class AnonymousCandFansClient:
                     profile_icon_path=f['profile_icon_path'],
                     profile_text=f['profile_text'],
                 )
+                for f in res_json['creators']
+            ]
+            self._cache_set('get_trend_new_commers', (page, per_page), new_commers)
+            return new_commers
 
-            page += 1
-            if page > max_page:
-                break
-            time.sleep(0.5)
+        pages = iter_pages(fetch_page, start_page, max_page)
+        for new_commers in prefetch_pages(pages, prefetch):
+            for new_commer in new_commers:
+                yield new_commer
+
+    def _build_items(
+            self,
+            model: Type[M],
+            items: List[Dict[str, Any]],
+            lazy: bool = False,
+            fields: Optional[Tuple[str, ...]] = None,
+            compact: bool = False,
+    ) -> List[M]:
+        """
+        Models by default, otherwise in order of precedence namedtuples of just `fields`,
+        compact records or LazyModel views.
+        """
+        self._intern(model, items)
+        if fields is not None:
+            return list(map(projection(model, fields), items))
+        if compact:
+            record = record_type(model)
+            return [build_record(record, item) for item in items]
+        if lazy:
+            return [LazyModel(model, item) for item in items]
+        return [model(**item) for item in items]
+
+    def _intern(self, model: Type[BaseModel], items: Iterable[Dict[str, Any]]) -> None:
+        fields = REPEATED_FIELDS.get(model)
+        if self.intern_table is None or fields is None:
+            return
+        for item in items:
+            self.intern_table.intern_fields(item, fields)
+
+    def _cache_get(self, endpoint: str, key):
+        if self.cache is None:
+            return None
+        return self.cache.get(endpoint, key)
+
+    def _cache_set(self, endpoint: str, key, value) -> None:
+        if self.cache is not None:
+            self.cache.set(endpoint, key, value)
 
     def _post(self, path: str, *arg, **kwargs):
         return self._request('POST', path, *arg, **kwargs)
@@ -261,16 +383,84 @@ class AnonymousCandFansClient:
     def _put(self, path: str, *arg, **kwargs):
         return self._request('PUT', path, *arg, **kwargs)
 
+    def _send(self, method: str, url: str, *arg, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                if delay >= 1 or self.debug:
+                    print(f'reach ratelimit. waiting {delay:.1f}s')
+                time.sleep(delay)
+            try:
+                response = self._session.request(method, url, *arg, **kwargs)
+            except httpx.TransportError as e:
+                if not self.retry_policy.should_retry(method, attempt, error=e):
+                    raise CandFansException(f'failed {method} for {url} [{e!r}]') from e
+                time.sleep(self.retry_policy.backoff(attempt))
+                continue
+            self.rate_limiter.update(response.headers)
+            if self.retry_policy.should_retry(method, attempt, response=response):
+                if self.debug:
+                    print(f'retry {method} for {url} status [{response.status_code}] attempt {attempt}')
+                time.sleep(self.retry_policy.backoff(attempt, response))
+                continue
+            return response
+
+    def _send_authenticated(self, method: str, url: str, *arg, **kwargs) -> httpx.Response:
+        generation = self._auth_generation
+        response = self._send(method, url, *arg, **kwargs)
+        if response.status_code in AUTH_ERROR_STATUSES and self._reauthenticate(generation):
+            kwargs['headers'] = self.header
+            response = self._send(method, url, *arg, **kwargs)
+        return response
+
+    def _reauthenticate(self, generation: int) -> bool:
+        return False
+
     def _request(self, method: str, path: str, *arg, **kwargs):
         url = f'{self.base_url}/{path}'
-        response = self._session.request(method, url, *arg, **kwargs)
-        ratelimit_remaining = response.headers.get("x-ratelimit-remaining")
+        response = self._send_authenticated(method, url, *arg, **kwargs)
+        return self._decode_response(method, path, url, response)
 
-        if ratelimit_remaining is not None and int(ratelimit_remaining) <= 10:
-            print(f'reach ratelimit {ratelimit_remaining}. waiting {self.ratelimit_reset_sec}s')
-            time.sleep(self.ratelimit_reset_sec)
+    def _get_page(
+            self,
+            path: str,
+            model: Type[M],
+            *arg,
+            lazy: bool = False,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+            **kwargs
+    ) -> List[M]:
+        """
+        GET a page envelope and validate its data straight from the response bytes.
+        With lazy, fields or compact the items are built from the decoded dicts instead, see _build_items.
+        """
+        fields = None if fields is None else tuple(fields)
+        url = f'{self.base_url}/{path}'
+        response = self._send_authenticated('GET', url, *arg, **kwargs)
+        if not self.debug and not lazy and not compact and fields is None:
+            try:
+                page = page_adapter(model).validate_json(response.content)
+            except ValidationError:
+                page = None
+            if page is not None and page.status == 'SUCCESS':
+                self._intern(model, [item.__dict__ for item in page.data])
+                return page.data
+        # failures and debug dumps take the dict path for its error reporting
+        response_json = self._decode_response('GET', path, url, response)
+        return self._build_items(model, response_json['data'], lazy, fields, compact)
+
+    def _decode_response(self, method: str, path: str, url: str, response: httpx.Response):
+        ratelimit_remaining = response.headers.get("x-ratelimit-remaining")
 
-        response_json = response.json()
+        try:
+            response_json = self.json_loads(response.content)
+        except ValueError:
+            raise CandFansException(
+                f'failed {method} for {path} status [{response.status_code}] invalid json'
+            )
 
         if self.debug:
             print(f'[{ratelimit_remaining=}]')
@@ -292,14 +482,15 @@ class AnonymousCandFansClient:
 
     def _v3_request(self, method: str, path: str, *arg, **kwargs):
         url = f'{self.base_url}/{path}'
-        response = self._session.request(method, url, *arg, **kwargs)
+        response = self._send_authenticated(method, url, *arg, **kwargs)
         ratelimit_remaining = response.headers.get("x-ratelimit-remaining")
 
-        if ratelimit_remaining is not None and int(ratelimit_remaining) <= 10:
-            print(f'reach ratelimit {ratelimit_remaining}. waiting {self.ratelimit_reset_sec}s')
-            time.sleep(self.ratelimit_reset_sec)
-
-        response_json = response.json()
+        try:
+            response_json = self.json_loads(response.content)
+        except ValueError:
+            raise CandFansException(
+                f'failed {method} for {path} status [{response.status_code}] invalid json'
+            )
 
         if self.debug:
             print(f'[{ratelimit_remaining=}]')
@@ -318,14 +509,28 @@ class CandFansClient(AnonymousCandFansClient):
         base_url: str = 'https://candfans.jp',
         ratelimit_reset_sec: int = 70,
         debug: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        sales_store: Optional[SalesStore] = None,
+        session_path: Optional[str] = None,
+        json_loads: Optional[JsonLoads] = None,
+        intern_table: Optional[InternTable] = None,
     ) -> None:
-        super().__init__(base_url, ratelimit_reset_sec, debug)
+        super().__init__(
+            base_url, ratelimit_reset_sec, debug, rate_limiter, retry_policy, cache, json_loads, intern_table,
+        )
         self._email = email
         self._password = password
+        self.sales_store = sales_store
+        self.session_path = session_path
         self._xsrf_token = None
+        self._auth_lock = threading.Lock()
 
-        self.logged_in = self.login()
-
+        if session_path is not None and self.load_session(session_path):
+            self.logged_in = True
+        else:
+            self.logged_in = self.login()
 
     @property
     def header(self):
@@ -340,8 +545,8 @@ class CandFansClient(AnonymousCandFansClient):
         return base
 
     def login(self) -> bool:
-        cookies = self._get_csrf_cookies()
-        self._xsrf_token = unquote(cookies['XSRF-TOKEN'])
+        self._refresh_xsrf_token()
+        logging_in = _logging_in.set(True)
         try:
             res = self._post(
                 'api/auth/login',
@@ -351,48 +556,133 @@ class CandFansClient(AnonymousCandFansClient):
                 },
                 headers=self.header,
             )
+            self._auth_generation += 1
+            # logging in rotates the token, the jar holds the new one
+            self._sync_xsrf_token()
+            if self.session_path is not None:
+                self.save_session(self.session_path)
             return True
         except CandFansException as e:
             raise e
+        finally:
+            _logging_in.reset(logging_in)
+
+    def save_session(self, path: str) -> None:
+        self._sync_xsrf_token()
+        SessionState.capture(self._session.cookies, self._xsrf_token).save(path)
 
-    def get_sales_history(self, month_yyyy_mm: str) -> List[SalesHistory]:
+    def load_session(self, path: str) -> bool:
+        """
+        Restore a session saved by save_session without logging in.
+        It is not verified here, the first request rejected as unauthenticated logs in again.
+        """
+        state = SessionState.load(path)
+        if state is None or not state.xsrf_token:
+            return False
+        state.apply(self._session.cookies)
+        self._xsrf_token = state.xsrf_token
+        return True
+
+    def _reauthenticate(self, generation: int) -> bool:
+        """
+        Log in again after a request was rejected as unauthenticated, so that it can be replayed.
+        Requests rejected concurrently share a single login.
+        """
+        if _logging_in.get():
+            # the login request itself has been rejected
+            return False
+        with self._auth_lock:
+            if generation == self._auth_generation:
+                self.logged_in = self.login()
+        return True
+
+    def get_sales_history(
+            self,
+            month_yyyy_mm: str,
+            refresh: bool = False,
+            concurrency: int = 1,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> List[Union[SalesHistory, SalesHistoryRecord, Tuple]]:
         """
         https://candfans.jp/api/orders/get-sales-history?month=2023-12&page=1
         :return:
         """
-        histories = []
-        page = 1
-        while True:
+        return list(self.iter_sales_history(month_yyyy_mm, refresh, concurrency, fields, compact))
+
+    def iter_sales_history(
+            self,
+            month_yyyy_mm: str,
+            refresh: bool = False,
+            concurrency: int = 1,
+            fields: Optional[Sequence[str]] = None,
+            compact: bool = False,
+    ) -> Generator[Union[SalesHistory, SalesHistoryRecord, Tuple], None, None]:
+        """
+        Yield the sales history of a month page by page, without holding the whole month in memory.
+        The month is saved to sales_store only once every page has been read.
+        With concurrency > 1 up to that many pages are fetched ahead at once and yielded in page order.
+        With fields only those fields are yielded as namedtuples, with compact=True SalesHistoryRecord.
+        """
+        fields = None if fields is None else tuple(fields)
+        histories = self._load_sales('get_sales_history', month_yyyy_mm, refresh)
+        if histories is not None:
+            for history in self._build_items(SalesHistory, histories, fields=fields, compact=compact):
+                yield history
+            return
+
+        # raw rows are only kept around when they are going to be stored
+        raw = [] if self.sales_store is not None and is_closed_month(month_yyyy_mm) else None
+
+        def fetch_page(page: int) -> List[Union[dict, SalesHistory, SalesHistoryRecord, Tuple]]:
+            path = f'api/orders/get-sales-history?month={month_yyyy_mm}&page={page}'
+            try:
+                if raw is None:
+                    return self._get_page(
+                        path, SalesHistory, headers=self.header, fields=fields, compact=compact
+                    )
+                res_json = self._get(path, headers=self.header)
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales history for month {month_yyyy_mm} page {page} [{e}]'
+                )
+            return res_json['data']
+
+        for rows in iter_pages(fetch_page, concurrency=concurrency):
+            if raw is not None:
+                raw += rows
+                rows = self._build_items(SalesHistory, rows, fields=fields, compact=compact)
+            for history in rows:
+                yield history
+        if raw is not None:
+            self._save_sales('get_sales_history', month_yyyy_mm, raw)
+
+    def get_sales_history_frame(
+            self, month_yyyy_mm: str, refresh: bool = False, concurrency: int = 1
+    ) -> SalesHistoryFrame:
+        """
+        The sales history of a month as a columnar SalesHistoryFrame, built without models.
+        Requires numpy.
+        """
+        return SalesHistoryFrame.from_rows(self.iter_sales_history(month_yyyy_mm, refresh, concurrency, COLUMNS))
+
+    def get_sales(self, month_yyyy_mm: str, refresh: bool = False) -> List[Sales]:
+        data = self._load_sales('get_sales', month_yyyy_mm, refresh)
+        if data is None:
             try:
                 res_json = self._get(
-                    f'api/orders/get-sales-history?month={month_yyyy_mm}&page={page}',
+                    f'api/orders/get-sales?month={month_yyyy_mm}',
                     headers=self.header
                 )
             except CandFansException as e:
                 raise CandFansException(
-                    f'failed get sales history for month {month_yyyy_mm} page {page} [{e}]'
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
                 )
-            if len(res_json['data']) == 0:
-                break
-            histories += res_json['data']
-            time.sleep(0.5)
-
-            page += 1
-        return [SalesHistory(**h) for h in histories]
+            data = res_json['data']
+            self._save_sales('get_sales', month_yyyy_mm, data)
+        return [Sales(**s) for s in data]
 
-    def get_sales(self, month_yyyy_mm: str) -> List[Sales]:
-        try:
-            res_json = self._get(
-                f'api/orders/get-sales?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return [Sales(**s) for s in res_json['data']]
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
-
-    def get_sales_purchase_post(self, month_yyyy_mm: str) -> SalesPurchasePost:
+    def get_sales_purchase_post(self, month_yyyy_mm: str, refresh: bool = False) -> SalesPurchasePost:
         """
         {
           "status": "SUCCESS",
@@ -418,18 +708,22 @@ class CandFansClient(AnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = self._get(
-                f'api/orders/get-sales-purchasepost?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesPurchasePost(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_purchase_post', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = self._get(
+                    f'api/orders/get-sales-purchasepost?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_purchase_post', month_yyyy_mm, data)
+        return SalesPurchasePost(**data)
 
-    def get_sales_subscribe(self, month_yyyy_mm: str) -> SalesSubscribe:
+    def get_sales_subscribe(self, month_yyyy_mm: str, refresh: bool = False) -> SalesSubscribe:
         """
         {
           "status": "SUCCESS",
@@ -452,18 +746,22 @@ class CandFansClient(AnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = self._get(
-                f'api/orders/get-sales-subscribe?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesSubscribe(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_subscribe', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = self._get(
+                    f'api/orders/get-sales-subscribe?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_subscribe', month_yyyy_mm, data)
+        return SalesSubscribe(**data)
 
-    def get_sales_chip(self, month_yyyy_mm: str) -> SalesChip:
+    def get_sales_chip(self, month_yyyy_mm: str, refresh: bool = False) -> SalesChip:
         """
         {
           "status": "SUCCESS",
@@ -481,18 +779,22 @@ class CandFansClient(AnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = self._get(
-                f'api/orders/get-sales-chip?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesChip(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_chip', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = self._get(
+                    f'api/orders/get-sales-chip?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_chip', month_yyyy_mm, data)
+        return SalesChip(**data)
 
-    def get_sales_backnumber(self, month_yyyy_mm: str) -> SalesBacknumber:
+    def get_sales_backnumber(self, month_yyyy_mm: str, refresh: bool = False) -> SalesBacknumber:
         """
         {
           "status": "SUCCESS",
@@ -511,16 +813,20 @@ class CandFansClient(AnonymousCandFansClient):
           }
         }
         """
-        try:
-            res_json = self._get(
-                f'api/orders/get-sales-backnumber?month={month_yyyy_mm}',
-                headers=self.header
-            )
-            return SalesBacknumber(**res_json['data'])
-        except CandFansException as e:
-            raise CandFansException(
-                f'failed get sales for month {month_yyyy_mm}[{e}]'
-            )
+        data = self._load_sales('get_sales_backnumber', month_yyyy_mm, refresh)
+        if data is None:
+            try:
+                res_json = self._get(
+                    f'api/orders/get-sales-backnumber?month={month_yyyy_mm}',
+                    headers=self.header
+                )
+            except CandFansException as e:
+                raise CandFansException(
+                    f'failed get sales for month {month_yyyy_mm}[{e}]'
+                )
+            data = res_json['data']
+            self._save_sales('get_sales_backnumber', month_yyyy_mm, data)
+        return SalesBacknumber(**data)
 
     def get_user_mine(self) -> MineUserInfo:
         """
@@ -543,8 +849,7 @@ class CandFansClient(AnonymousCandFansClient):
 
     def follow(self, user_id: int) -> FollowStatus:
         try:
-            cookies = self._get_csrf_cookies()
-            self._xsrf_token = unquote(cookies['XSRF-TOKEN'])
+            self._ensure_xsrf_token()
             res_json = self._put(
                 f'api/user/put-follow/{user_id}',
                 headers=self.header
@@ -559,8 +864,34 @@ class CandFansClient(AnonymousCandFansClient):
                 f'failed follow of [{user_id}] [{e}]'
             )
 
+    def _load_sales(self, endpoint: str, month_yyyy_mm: str, refresh: bool):
+        if self.sales_store is None or refresh or not is_closed_month(month_yyyy_mm):
+            return None
+        return self.sales_store.get(endpoint, month_yyyy_mm)
+
+    def _save_sales(self, endpoint: str, month_yyyy_mm: str, data) -> None:
+        if self.sales_store is not None and is_closed_month(month_yyyy_mm):
+            self.sales_store.set(endpoint, month_yyyy_mm, data)
+
+    def _ensure_xsrf_token(self) -> None:
+        self._sync_xsrf_token()
+        if self._xsrf_token is None:
+            self._refresh_xsrf_token()
+
+    def _sync_xsrf_token(self) -> None:
+        """
+        Take the XSRF token from the cookie jar, which every response keeps current.
+        """
+        token = self._session.cookies.get('XSRF-TOKEN')
+        if token:
+            self._xsrf_token = unquote(token)
+
+    def _refresh_xsrf_token(self) -> None:
+        cookies = self._get_csrf_cookies()
+        self._xsrf_token = unquote(cookies['XSRF-TOKEN'])
+
     def _get_csrf_cookies(self):
         url = f'{self._base_url}/api/sanctum/csrf-cookie'
-        res = self._session.get(url)
+        res = self._send('GET', url)
         cookies = res.cookies
         return cookies
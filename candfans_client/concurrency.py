@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Generator, Iterable, Tuple, TypeVar, Union
+
+from candfans_client.exceptions import CandFansException
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+def bounded_map(
+    func: Callable[[K], V],
+    items: Iterable[K],
+    concurrency: int = 5,
+) -> Generator[Tuple[K, Union[V, CandFansException]], None, None]:
+    """
+    Run func over items on up to `concurrency` threads and yield (item, result)
+    in completion order. A CandFansException is yielded as the result of its item instead of
+    aborting the others.
+    """
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be >= 1 [{concurrency}]')
+    iterator = iter(items)
+    pending: Dict[Future, K] = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='candfans') as executor:
+        def schedule():
+            for item in iterator:
+                pending[executor.submit(func, item)] = item
+                if len(pending) >= concurrency:
+                    return
+
+        try:
+            schedule()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except CandFansException as e:
+                        result = e
+                    yield item, result
+                schedule()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def abounded_map(
+    func: Callable[[K], Awaitable[V]],
+    items: Iterable[K],
+    concurrency: int = 5,
+) -> AsyncGenerator[Tuple[K, Union[V, CandFansException]], None]:
+    """
+    Run func over items with at most `concurrency` calls in flight and yield (item, result)
+    in completion order. A CandFansException is yielded as the result of its item instead of
+    aborting the others.
+    """
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be >= 1 [{concurrency}]')
+    iterator = iter(items)
+    pending: Dict[asyncio.Future, K] = {}
+
+    def schedule():
+        for item in iterator:
+            pending[asyncio.ensure_future(func(item))] = item
+            if len(pending) >= concurrency:
+                return
+
+    try:
+        schedule()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                try:
+                    result = task.result()
+                except CandFansException as e:
+                    result = e
+                yield item, result
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+
+from typing import Any, Callable
+
+# decodes a raw response body, raising ValueError on malformed input
+JsonLoads = Callable[[bytes], Any]
+
+
+def orjson_loads() -> JsonLoads:
+    import orjson
+    return orjson.loads
+
+
+def msgspec_loads() -> JsonLoads:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+
+    def loads(content: bytes) -> Any:
+        try:
+            return decoder.decode(content)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return loads
+
+
+def stdlib_loads() -> JsonLoads:
+    return json.loads
+
+
+def default_json_loads() -> JsonLoads:
+    """
+    The fastest installed decoder: orjson, then msgspec, then the stdlib json.
+    """
+    for factory in (orjson_loads, msgspec_loads):
+        try:
+            return factory()
+        except ImportError:
+            continue
+    return stdlib_loads()
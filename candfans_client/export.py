@@ -0,0 +1,530 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import queue
+import threading
+
+from contextlib import ExitStack
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping,
+    Optional, Sequence, Tuple, Type, Union, get_args, get_origin
+)
+
+from pydantic import BaseModel
+
+from candfans_client.models.construct import Converter, converter
+from candfans_client.models.lazy import LazyModel
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+Row = Union[BaseModel, LazyModel, Mapping[str, Any], Tuple]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('arrow and parquet export requires pyarrow, install candfans-client[arrow]')
+    return pyarrow
+
+
+def arrow_schema(model: Type[BaseModel]) -> 'pa.Schema':
+    """
+    The fixed arrow schema of `model`, derived from its fields.
+    """
+    return _schema(model)
+
+
+def iter_record_batches(
+        rows: Iterable[Row],
+        model: Type[BaseModel],
+        batch_size: int = 65536,
+) -> Iterator['pa.RecordBatch']:
+    """
+    Turn models, lazy views, compact records or raw dicts of `model` into record batches of up to batch_size rows,
+    holding only one batch in memory at a time.
+    """
+    batches = _Batches(model, batch_size)
+    for row in rows:
+        batch = batches.add(row)
+        if batch is not None:
+            yield batch
+    batch = batches.flush()
+    if batch is not None:
+        yield batch
+
+
+async def aiter_record_batches(
+        rows: AsyncIterable[Row],
+        model: Type[BaseModel],
+        batch_size: int = 65536,
+) -> AsyncIterator['pa.RecordBatch']:
+    """
+    iter_record_batches() over the async client's generators.
+    """
+    batches = _Batches(model, batch_size)
+    async for row in rows:
+        batch = batches.add(row)
+        if batch is not None:
+            yield batch
+    batch = batches.flush()
+    if batch is not None:
+        yield batch
+
+
+def write_parquet(
+        rows: Iterable[Row],
+        model: Type[BaseModel],
+        where: Union[str, BinaryIO],
+        row_group_size: int = 65536,
+        compression: str = 'zstd',
+) -> int:
+    """
+    Stream rows into a parquet file, one row group per `row_group_size` rows.
+    :return: the number of rows written
+    """
+    pa = _pyarrow()
+    count = 0
+    with pa.parquet.ParquetWriter(where, arrow_schema(model), compression=compression) as writer:
+        for batch in iter_record_batches(rows, model, row_group_size):
+            writer.write_batch(batch, row_group_size=row_group_size)
+            count += batch.num_rows
+    return count
+
+
+async def awrite_parquet(
+        rows: AsyncIterable[Row],
+        model: Type[BaseModel],
+        where: Union[str, BinaryIO],
+        row_group_size: int = 65536,
+        compression: str = 'zstd',
+) -> int:
+    """
+    write_parquet() over the async client's generators, encoding each row group off the event loop.
+    :return: the number of rows written
+    """
+    pa = _pyarrow()
+    loop = asyncio.get_running_loop()
+    count = 0
+    with pa.parquet.ParquetWriter(where, arrow_schema(model), compression=compression) as writer:
+        async for batch in aiter_record_batches(rows, model, row_group_size):
+            await loop.run_in_executor(None, partial(writer.write_batch, batch, row_group_size=row_group_size))
+            count += batch.num_rows
+    return count
+
+
+def write_arrow(
+        rows: Iterable[Row],
+        model: Type[BaseModel],
+        where: Union[str, BinaryIO],
+        batch_size: int = 65536,
+) -> int:
+    """
+    Stream rows into an arrow IPC file, one record batch per `batch_size` rows.
+    :return: the number of rows written
+    """
+    pa = _pyarrow()
+    count = 0
+    with pa.ipc.new_file(where, arrow_schema(model)) as writer:
+        for batch in iter_record_batches(rows, model, batch_size):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+async def awrite_arrow(
+        rows: AsyncIterable[Row],
+        model: Type[BaseModel],
+        where: Union[str, BinaryIO],
+        batch_size: int = 65536,
+) -> int:
+    """
+    write_arrow() over the async client's generators, writing each batch off the event loop.
+    :return: the number of rows written
+    """
+    pa = _pyarrow()
+    loop = asyncio.get_running_loop()
+    count = 0
+    with pa.ipc.new_file(where, arrow_schema(model)) as writer:
+        async for batch in aiter_record_batches(rows, model, batch_size):
+            await loop.run_in_executor(None, writer.write_batch, batch)
+            count += batch.num_rows
+    return count
+
+
+def export_jsonl(
+        rows: Iterable[Row],
+        where: Union[str, BinaryIO],
+        compression: Optional[str] = None,
+        background: bool = True,
+        chunk_size: int = 1000,
+) -> int:
+    """
+    Write rows one JSON object per line while consuming `rows`, chunk_size lines at a time.
+    :param compression: None, 'gzip' or 'zstd', inferred from a .gz / .zst path by default
+    :param background: write from a separate thread so fetching the next pages overlaps the disk I/O
+    :return: the number of rows written
+    """
+    encoder = _JsonlChunks(chunk_size)
+    _write_chunks(_encode(rows, encoder), where, compression, background)
+    return encoder.count
+
+
+async def aexport_jsonl(
+        rows: AsyncIterable[Row],
+        where: Union[str, BinaryIO],
+        compression: Optional[str] = None,
+        chunk_size: int = 1000,
+) -> int:
+    """
+    export_jsonl() over the async client's generators, always writing from the background thread.
+    :return: the number of rows written
+    """
+    encoder = _JsonlChunks(chunk_size)
+    await _awrite_chunks(_aencode(rows, encoder), where, compression)
+    return encoder.count
+
+
+def export_csv(
+        rows: Iterable[Row],
+        where: Union[str, BinaryIO],
+        columns: Optional[Sequence[str]] = None,
+        compression: Optional[str] = None,
+        background: bool = True,
+        chunk_size: int = 1000,
+) -> int:
+    """
+    Write rows as CSV with a header line while consuming `rows`, chunk_size lines at a time.
+    Nested values such as Post.plans are written as JSON.
+    :param columns: the header, the fields of the first row by default
+    :param compression: None, 'gzip' or 'zstd', inferred from a .gz / .zst path by default
+    :param background: write from a separate thread so fetching the next pages overlaps the disk I/O
+    :return: the number of rows written
+    """
+    encoder = _CsvChunks(columns, chunk_size)
+    _write_chunks(_encode(rows, encoder), where, compression, background)
+    return encoder.count
+
+
+async def aexport_csv(
+        rows: AsyncIterable[Row],
+        where: Union[str, BinaryIO],
+        columns: Optional[Sequence[str]] = None,
+        compression: Optional[str] = None,
+        chunk_size: int = 1000,
+) -> int:
+    """
+    export_csv() over the async client's generators, always writing from the background thread.
+    :return: the number of rows written
+    """
+    encoder = _CsvChunks(columns, chunk_size)
+    await _awrite_chunks(_aencode(rows, encoder), where, compression)
+    return encoder.count
+
+
+class _JsonlChunks:
+    """
+    Encodes rows into JSON lines, handing out a chunk every chunk_size rows.
+    """
+
+    def __init__(self, chunk_size: int):
+        self.count = 0
+        self._chunk_size = chunk_size
+        self._lines: List[str] = []
+
+    def add(self, row: Row) -> Optional[str]:
+        self._lines.append(json.dumps(_jsonable(row), ensure_ascii=False))
+        self.count += 1
+        if len(self._lines) >= self._chunk_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._lines:
+            return None
+        chunk = '\n'.join(self._lines) + '\n'
+        self._lines = []
+        return chunk
+
+
+class _CsvChunks:
+    """
+    Encodes rows into CSV lines after a header, handing out a chunk every chunk_size rows.
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]], chunk_size: int):
+        self.count = 0
+        self._columns = columns
+        self._chunk_size = chunk_size
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def add(self, row: Row) -> Optional[str]:
+        values = _jsonable(row)
+        if self._columns is None:
+            self._columns = list(values)
+        if self.count == 0:
+            self._writer.writerow(self._columns)
+        self._writer.writerow([_cell(values.get(name)) for name in self._columns])
+        self.count += 1
+        if self.count % self._chunk_size == 0:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        if self.count == 0 and self._columns is not None and not self._buffer.tell():
+            self._writer.writerow(self._columns)
+        if not self._buffer.tell():
+            return None
+        chunk = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return chunk
+
+
+def _encode(rows: Iterable[Row], encoder: Union[_JsonlChunks, _CsvChunks]) -> Iterator[str]:
+    for row in rows:
+        chunk = encoder.add(row)
+        if chunk is not None:
+            yield chunk
+    chunk = encoder.flush()
+    if chunk is not None:
+        yield chunk
+
+
+async def _aencode(rows: AsyncIterable[Row], encoder: Union[_JsonlChunks, _CsvChunks]) -> AsyncIterator[str]:
+    async for row in rows:
+        chunk = encoder.add(row)
+        if chunk is not None:
+            yield chunk
+    chunk = encoder.flush()
+    if chunk is not None:
+        yield chunk
+
+
+class _BackgroundWriter:
+    """
+    Hands chunks to a writer thread through a bounded queue, re-raising its errors in the caller.
+    """
+
+    def __init__(self, write: Callable[[bytes], Any], maxsize: int = 8):
+        self._write = write
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            # keep draining after a failure so that the caller never blocks on a full queue
+            if self._error is None:
+                try:
+                    self._write(chunk)
+                except BaseException as e:
+                    self._error = e
+
+    def write(self, chunk: bytes):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(chunk)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def _write_chunks(
+        chunks: Iterator[str],
+        where: Union[str, BinaryIO],
+        compression: Optional[str],
+        background: bool,
+):
+    with ExitStack() as stack:
+        stream = _open(stack, where, compression)
+        if not background:
+            for chunk in chunks:
+                stream.write(chunk.encode('utf-8'))
+            return
+        writer = _BackgroundWriter(stream.write)
+        try:
+            for chunk in chunks:
+                writer.write(chunk.encode('utf-8'))
+        finally:
+            writer.close()
+
+
+async def _awrite_chunks(
+        chunks: AsyncIterator[str],
+        where: Union[str, BinaryIO],
+        compression: Optional[str],
+):
+    loop = asyncio.get_running_loop()
+    with ExitStack() as stack:
+        stream = _open(stack, where, compression)
+        writer = _BackgroundWriter(stream.write)
+        try:
+            async for chunk in chunks:
+                # a full queue blocks, which must not stall the event loop
+                await loop.run_in_executor(None, writer.write, chunk.encode('utf-8'))
+        finally:
+            await loop.run_in_executor(None, writer.close)
+
+
+def _open(stack: ExitStack, where: Union[str, BinaryIO], compression: Optional[str]) -> BinaryIO:
+    if isinstance(where, str):
+        if compression is None:
+            compression = 'gzip' if where.endswith('.gz') else 'zstd' if where.endswith('.zst') else None
+        stream = stack.enter_context(open(where, 'wb'))
+    else:
+        stream = where
+    if compression is None:
+        return stream
+    if compression == 'gzip':
+        return stack.enter_context(gzip.GzipFile(fileobj=stream, mode='wb'))
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstd compression requires zstandard, install candfans-client[zstd]')
+        return stack.enter_context(zstandard.ZstdCompressor().stream_writer(stream, closefd=False))
+    raise ValueError(f'unknown compression [{compression}]')
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json')
+    if isinstance(value, LazyModel):
+        # written as received, like any other raw row
+        return value.to_dict()
+    if isinstance(value, tuple) and hasattr(value, '_asdict'):
+        return {name: _jsonable(v) for name, v in zip(value._fields, value)}
+    if isinstance(value, Mapping):
+        return {name: _jsonable(v) for name, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class _Batches:
+    """
+    Collects rows column by column, handing out a record batch every batch_size rows.
+    """
+
+    def __init__(self, model: Type[BaseModel], batch_size: int):
+        self._pa = _pyarrow()
+        self._schema = arrow_schema(model)
+        self._plan = _plan(model)
+        self._batch_size = batch_size
+        self._columns: Dict[str, List[Any]] = {name: [] for name, _ in self._plan}
+        self._size = 0
+
+    def add(self, row: Row) -> Optional['pa.RecordBatch']:
+        values = _values(row)
+        columns = self._columns
+        for name, convert in self._plan:
+            value = values.get(name)
+            if convert is not None and value is not None:
+                value = convert(value)
+            columns[name].append(value)
+        self._size += 1
+        if self._size >= self._batch_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional['pa.RecordBatch']:
+        if not self._size:
+            return None
+        pa = self._pa
+        arrays = [pa.array(self._columns[field.name], type=field.type) for field in self._schema]
+        self._columns = {name: [] for name, _ in self._plan}
+        self._size = 0
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+
+def _values(row: Row) -> Mapping[str, Any]:
+    if isinstance(row, BaseModel):
+        return row.__dict__
+    if isinstance(row, LazyModel):
+        # the raw dict goes through the same converters as any other raw row
+        return row.to_dict()
+    if isinstance(row, tuple) and hasattr(row, '_asdict'):
+        return row._asdict()
+    return row
+
+
+@lru_cache(maxsize=None)
+def _schema(model: Type[BaseModel]) -> 'pa.Schema':
+    pa = _pyarrow()
+    return pa.schema([
+        pa.field(name, _arrow_type(pa, field.annotation), nullable=True)
+        for name, field in model.model_fields.items()
+    ])
+
+
+def _arrow_type(pa, annotation: Any) -> 'pa.DataType':
+    origin = get_origin(annotation)
+    if origin is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return _arrow_type(pa, args[0])
+        if set(args) <= {int, float}:
+            return pa.float64()
+    elif origin in (list, List):
+        return pa.list_(_arrow_type(pa, get_args(annotation)[0]))
+    elif annotation is bool:
+        return pa.bool_()
+    elif annotation is int:
+        return pa.int64()
+    elif annotation is float:
+        return pa.float64()
+    elif annotation is str:
+        return pa.string()
+    elif annotation is datetime:
+        return pa.timestamp('us')
+    elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pa.struct([
+            pa.field(name, _arrow_type(pa, field.annotation)) for name, field in annotation.model_fields.items()
+        ])
+    raise TypeError(f'no arrow type for {annotation}')
+
+
+@lru_cache(maxsize=None)
+def _plan(model: Type[BaseModel]) -> Tuple[Tuple[str, Optional[Converter]], ...]:
+    return tuple((name, converter(field.annotation, _nested)) for name, field in model.model_fields.items())
+
+
+def _nested(model: Type[BaseModel]) -> Converter:
+    plan = _plan(model)
+
+    def convert(value: Row) -> Dict[str, Any]:
+        values = _values(value)
+        result = {}
+        for name, convert_field in plan:
+            field_value = values.get(name)
+            if convert_field is not None and field_value is not None:
+                field_value = convert_field(field_value)
+            result[name] = field_value
+        return result
+
+    return convert
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from datetime import datetime
+from operator import attrgetter, itemgetter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from candfans_client.models.sales import SalesHistory
+
+if TYPE_CHECKING:
+    import numpy as np
+
+COLUMNS: Tuple[str, ...] = tuple(SalesHistory.model_fields)
+DATE_COLUMN = 'sales_date'
+INT_COLUMNS: Tuple[str, ...] = tuple(
+    name for name, field in SalesHistory.model_fields.items() if field.annotation is int
+)
+CATEGORY_COLUMNS: Tuple[str, ...] = tuple(
+    name for name, field in SalesHistory.model_fields.items() if field.annotation is str
+)
+AMOUNT_COLUMNS: Tuple[str, ...] = tuple(name for name in INT_COLUMNS if name.endswith('_amount'))
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('SalesHistoryFrame requires numpy, install candfans-client[numpy]')
+    return numpy
+
+
+class SalesHistoryFrame:
+    """
+    Columnar sales history.
+    Integer columns are int64 arrays, sales_date is datetime64[s], and string columns are
+    int32 codes into a per-column list of categories.
+    """
+
+    def __init__(self, columns: Dict[str, 'np.ndarray'], categories: Dict[str, List[str]]):
+        self._columns = columns
+        self._categories = categories
+
+    @classmethod
+    def from_rows(
+            cls,
+            rows: Iterable[Union[Mapping[str, Any], SalesHistory, Tuple]],
+            chunk_size: int = 65536,
+    ) -> SalesHistoryFrame:
+        """
+        Build from raw dicts, SalesHistory models or records, consuming `rows` chunk by chunk.
+        """
+        np = _numpy()
+        chunks: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        index: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORY_COLUMNS}
+        by_key = itemgetter(*COLUMNS)
+        by_attr = attrgetter(*COLUMNS)
+
+        def flush(buffer: List[Tuple]):
+            for name, values in zip(COLUMNS, zip(*buffer)):
+                if name == DATE_COLUMN:
+                    array = np.array([_naive(v) for v in values], dtype='datetime64[s]')
+                elif name in index:
+                    codes = index[name]
+                    array = np.fromiter(
+                        (codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=len(values)
+                    )
+                else:
+                    array = np.fromiter(values, dtype=np.int64, count=len(values))
+                chunks[name].append(array)
+
+        buffer: List[Tuple] = []
+        for row in rows:
+            buffer.append(by_key(row) if isinstance(row, Mapping) else by_attr(row))
+            if len(buffer) >= chunk_size:
+                flush(buffer)
+                buffer = []
+        if buffer:
+            flush(buffer)
+
+        columns = {}
+        for name in COLUMNS:
+            if chunks[name]:
+                columns[name] = np.concatenate(chunks[name])
+            elif name == DATE_COLUMN:
+                columns[name] = np.empty(0, dtype='datetime64[s]')
+            else:
+                columns[name] = np.empty(0, dtype=np.int32 if name in index else np.int64)
+        categories = {name: list(codes) for name, codes in index.items()}
+        return cls(columns, categories)
+
+    def __len__(self) -> int:
+        return len(self._columns[DATE_COLUMN])
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return COLUMNS
+
+    def codes(self, name: str) -> 'np.ndarray':
+        """
+        The raw column, which for string columns is the codes into categories(name).
+        """
+        return self._columns[name]
+
+    def categories(self, name: str) -> List[str]:
+        return self._categories[name]
+
+    def column(self, name: str) -> 'np.ndarray':
+        """
+        The column with string columns decoded into an object array.
+        """
+        if name == 'day':
+            return self._columns[DATE_COLUMN].astype('datetime64[D]')
+        values = self._columns[name]
+        if name in self._categories:
+            np = _numpy()
+            return np.asarray(self._categories[name], dtype=object)[values]
+        return values
+
+    def groupby_sum(
+            self,
+            by: Union[str, Sequence[str]],
+            columns: Optional[Sequence[str]] = None,
+    ) -> Dict[str, 'np.ndarray']:
+        """
+        Sum `columns` (all *_amount columns by default) per distinct combination of `by`.
+        `by` takes column names plus 'day' for sales_date truncated to the day.
+        :return: {name: array} with one entry per group, ordered by the group keys
+            (string columns order by first appearance)
+        """
+        np = _numpy()
+        by = (by,) if isinstance(by, str) else tuple(by)
+        columns = AMOUNT_COLUMNS if columns is None else tuple(columns)
+        if not by:
+            raise ValueError('groupby_sum needs at least one column to group by')
+
+        # combine the per-key inverse indices into one group id, mixed radix style
+        group = np.zeros(len(self), dtype=np.int64)
+        uniques = []
+        for name in by:
+            keys = self._key(name)
+            unique, inverse = np.unique(keys, return_inverse=True)
+            group = group * len(unique) + inverse.reshape(-1)
+            uniques.append((name, unique))
+        group_ids, group = np.unique(group, return_inverse=True)
+        group = group.reshape(-1)
+
+        result: Dict[str, np.ndarray] = {}
+        # unravel each group id back into the index of every key
+        remaining = group_ids
+        for name, unique in reversed(uniques):
+            remaining, position = np.divmod(remaining, len(unique))
+            keys = unique[position]
+            if name in self._categories:
+                keys = np.asarray(self._categories[name], dtype=object)[keys]
+            result[name] = keys
+        result = {name: result[name] for name in by}
+        for name in columns:
+            sums = np.bincount(group, weights=self._columns[name], minlength=len(group_ids))
+            result[name] = sums.astype(np.int64)
+        return result
+
+    def _key(self, name: str) -> 'np.ndarray':
+        if name == 'day':
+            return self._columns[DATE_COLUMN].astype('datetime64[D]')
+        return self._columns[name]
+
+
+def _naive(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import threading
+
+from typing import Dict, Iterable, MutableMapping, Tuple, Type
+
+from pydantic import BaseModel
+
+from candfans_client.models.sales import SalesHistory
+from candfans_client.models.timeline import Post
+
+# string fields which repeat across the items of a crawl
+REPEATED_FIELDS: Dict[Type[BaseModel], Tuple[str, ...]] = {
+    Post: ('user_code', 'username', 'profile_img', 'profile_cover_img'),
+    SalesHistory: ('plan_name', 'profile_img', 'backnumber_plan_name'),
+}
+
+
+class InternTable:
+    """
+    Bounded table handing out one shared instance per distinct string, so that
+    items holding equal strings keep a single copy alive.
+    Once maxsize is reached the oldest entries are dropped first.
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        if maxsize < 1:
+            raise ValueError(f'maxsize must be >= 1 [{maxsize}]')
+        self.maxsize = maxsize
+        self._table: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, value: str) -> str:
+        interned = self._table.get(value)
+        if interned is not None:
+            return interned
+        with self._lock:
+            interned = self._table.get(value)
+            if interned is not None:
+                return interned
+            if len(self._table) >= self.maxsize:
+                del self._table[next(iter(self._table))]
+            self._table[value] = value
+        return value
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def intern_fields(self, values: MutableMapping[str, object], fields: Iterable[str]) -> None:
+        """
+        Swap the string values of `fields` for their shared instance, in place.
+        """
+        for name in fields:
+            value = values.get(name)
+            if type(value) is str:
+                values[name] = self(value)
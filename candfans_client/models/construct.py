@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+Converter = Callable[[Any], Any]
+
+_datetime_adapter = TypeAdapter(datetime)
+
+
+def parse_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    # anything fromisoformat can't handle (e.g. a 'Z' suffix before 3.11) gets pydantic's parsing
+    return _datetime_adapter.validate_python(value)
+
+
+def converter(annotation: Any, nested: Callable[[type], Converter]) -> Optional[Converter]:
+    """
+    How to turn a trusted raw value of `annotation` into its python value, or None when it can be kept as is.
+    Nested models and records are handed to `nested`, which returns their converter.
+    """
+    origin = get_origin(annotation)
+    if origin is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        return converter(args[0], nested) if len(args) == 1 else None
+    if origin in (list, tuple):
+        convert_item = converter(get_args(annotation)[0], nested)
+        if convert_item is None:
+            return None
+        return lambda values: origin(None if v is None else convert_item(v) for v in values)
+    if annotation is datetime:
+        return parse_datetime
+    if annotation is bool:
+        return bool
+    if isinstance(annotation, type) and (issubclass(annotation, BaseModel) or hasattr(annotation, '_fields')):
+        return nested(annotation)
+    return None
@@ -0,0 +1,100 @@
+from functools import lru_cache
+from typing import Annotated, Any, Dict, FrozenSet, Generic, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+M = TypeVar('M', bound=BaseModel)
+
+_MISSING = object()
+_get = object.__getattribute__
+
+
+class LazyModel(Generic[M]):
+    """
+    Read-only view over a raw response dict.
+    Each field is validated against `model` the first time it is read and cached from then on.
+    """
+    __slots__ = ('_model', '_data', '_values', '_fields')
+
+    def __init__(self, model: Type[M], data: Dict[str, Any]):
+        self._model = model
+        self._data = data
+        self._values: Dict[str, Any] = {}
+        self._fields = _fields(model)
+
+    def __getattribute__(self, name: str) -> Any:
+        # fields are served here directly, falling back to __getattr__ costs a failed lookup per read
+        if name[0] == '_':
+            return _get(self, name)
+        field = _get(self, '_fields').get(name)
+        if field is None:
+            try:
+                return _get(self, name)
+            except AttributeError:
+                raise AttributeError(f'{_get(self, "_model").__name__} has no field {name}') from None
+        values = _get(self, '_values')
+        value = values.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        adapter, plain_types = field
+        data = _get(self, '_data')
+        if name in data:
+            value = data[name]
+            # a raw value already of the annotated type would come out of validation unchanged
+            if type(value) in plain_types:
+                return value
+            value = adapter.validate_python(value)
+        else:
+            model = _get(self, '_model')
+            info = model.model_fields[name]
+            if info.is_required():
+                raise AttributeError(f'{model.__name__}.{name} is missing from the response')
+            value = info.get_default(call_default_factory=True)
+        values[name] = value
+        return value
+
+    def to_model(self) -> M:
+        """
+        Validate every field at once into the eager model.
+        """
+        return self._model(**self._data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The raw response dict behind the view, not to be modified.
+        """
+        return self._data
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyModel):
+            return self._model is other._model and self._data == other._data
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'LazyModel[{self._model.__name__}]({self._data!r})'
+
+
+@lru_cache(maxsize=None)
+def _fields(model: Type[BaseModel]) -> Dict[str, Tuple[TypeAdapter, FrozenSet[type]]]:
+    """
+    {name: (adapter, the raw types returned without validation)} of each field.
+    """
+    fields = {}
+    for name, field in model.model_fields.items():
+        if field.metadata:
+            fields[name] = (TypeAdapter(Annotated[(field.annotation, *field.metadata)]), frozenset())
+        else:
+            fields[name] = (TypeAdapter(field.annotation), _plain_types(field.annotation))
+    return fields
+
+
+def _plain_types(annotation: Any) -> FrozenSet[type]:
+    if get_origin(annotation) is Union:
+        args = get_args(annotation)
+        types = [_plain_types(a) for a in args if a is not type(None)]
+        if len(types) == 1 and types[0]:
+            return types[0] | {type(None)}
+        return frozenset()
+    if annotation in (int, float, str, bool):
+        return frozenset({annotation})
+    return frozenset()
@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import Generic, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+T = TypeVar('T')
+M = TypeVar('M', bound=BaseModel)
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    {"status": "SUCCESS", "message": "...", "data": [...]}
+    """
+    status: str
+    message: Optional[str] = None
+    data: List[T]
+
+
+@lru_cache(maxsize=None)
+def page_adapter(model: Type[T]) -> TypeAdapter:
+    """
+    TypeAdapter for Page[model], built once per model.
+    """
+    return TypeAdapter(Page[model])
@@ -0,0 +1,26 @@
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple, Type
+
+from pydantic import BaseModel
+
+
+def projection(model: Type[BaseModel], fields: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Tuple]:
+    """
+    Function picking `fields` out of a raw item of `model` into a namedtuple, without any validation.
+    """
+    record = _record_type(model, fields)
+    make = record._make
+
+    def project(item: Dict[str, Any]) -> Tuple:
+        return make(map(item.get, fields))
+
+    return project
+
+
+@lru_cache(maxsize=None)
+def _record_type(model: Type[BaseModel], fields: Tuple[str, ...]) -> type:
+    unknown = [f for f in fields if f not in model.model_fields]
+    if unknown:
+        raise ValueError(f'{model.__name__} has no field {unknown}')
+    return namedtuple(f'{model.__name__}Fields', fields)
@@ -0,0 +1,166 @@
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type, Union, get_type_hints
+
+from pydantic import BaseModel
+
+from candfans_client.models.construct import Converter, converter
+from candfans_client.models.sales import SalesHistory
+from candfans_client.models.search import RankingCreator
+from candfans_client.models.timeline import Post
+from candfans_client.models.user import User
+
+
+class ShortPlanRecord(NamedTuple):
+    plan_id: int
+    support_price: int
+    total_support_price: int
+    plan_name: str
+    plan_detail: str
+    backnumber_id: Optional[int]
+    backnumber_price: Optional[int]
+    total_backnumber_price: Optional[int]
+    can_see_backnumber_plan_pay: bool
+    can_buy_backnumber_not_entry_plan: bool
+    add_backnumber_date: Optional[str]
+    is_joined_plan: bool
+
+
+class AttachmentRecord(NamedTuple):
+    default: str
+    low: Optional[str]
+
+
+class PostRecord(NamedTuple):
+    month: str
+    post_id: int
+    user_id: int
+    user_code: str
+    username: str
+    profile_img: str
+    profile_cover_img: str
+    post_date: str
+    contents_type: int
+    post_type: int
+    title: str
+    contents_text: str
+    over_contents_50str: int
+    price: int
+    limit_post_date: str
+    reserve_post_date: str
+    contents_path1: str
+    contents_path2: str
+    contents_path3: str
+    contents_path4: str
+    image_count: int
+    movie_time: Optional[float]
+    secret_file: str
+    thumbnail_file: Optional[str]
+    like_cnt: int
+    comments_cnt: int
+    is_like: bool
+    can_browsing: bool
+    can_send_chip: bool
+    apply_status: int
+    is_progressed: bool
+    is_accept_comment: bool
+    can_read_text: bool
+    is_official_creator: bool
+    has_own_thumbnail: bool
+    is_on_air: bool
+    live_url: str
+    audio_time: Optional[float]
+    sample_time: Optional[float]
+    share_count: int
+    plans: Tuple[ShortPlanRecord, ...]
+    attachments: Tuple[AttachmentRecord, ...]
+    attachment_length: Union[int, float]
+
+
+class UserRecord(NamedTuple):
+    user_id: int
+    user_code: str
+    username: str
+    profile_img: str
+    is_follow: bool
+    is_official_creator: bool
+    is_on_air: bool
+    live_url: str
+
+
+class SalesHistoryRecord(NamedTuple):
+    orders_id: int
+    orders_type: int
+    sales_date: datetime
+    user_id: int
+    user_code: str
+    username: str
+    profile_img: str
+    subscribe_amount: int
+    purchase_post_amount: int
+    user_chip_amount: int
+    post_chip_amount: int
+    message_chip_amount: int
+    message_amount: int
+    backnumber_amount: int
+    streaming_amount: int
+    subscribe_affiliate_amount: int
+    purchase_post_affiliate_amount: int
+    affiliate_amount: int
+    plan_id: int
+    plan_name: str
+    support_price: int
+    post_id: int
+    thread_message_id: int
+    purchase_post_id: int
+    backnumber_id: int
+    backnumber_month: str
+    backnumber_plan_name: str
+
+
+class RankingCreatorRecord(NamedTuple):
+    rank: int
+    user_id: int
+    user_code: str
+    username: str
+    profile_cover_path: Optional[str]
+    profile_icon_path: Optional[str]
+    profile_text: Optional[str]
+
+
+RECORD_TYPES: Dict[Type[BaseModel], type] = {
+    Post: PostRecord,
+    User: UserRecord,
+    SalesHistory: SalesHistoryRecord,
+    RankingCreator: RankingCreatorRecord,
+}
+
+
+def record_type(model: Type[BaseModel]) -> type:
+    try:
+        return RECORD_TYPES[model]
+    except KeyError:
+        raise ValueError(f'no compact record for {model.__name__}')
+
+
+def build_record(record: type, data: Dict[str, Any]) -> Tuple:
+    """
+    Build a record from a trusted raw item, converting only the datetime and bool fields and nested records.
+    """
+    values = []
+    for name, convert in _plan(record):
+        value = data.get(name)
+        if convert is not None and value is not None:
+            value = convert(value)
+        values.append(value)
+    return tuple.__new__(record, values)
+
+
+@lru_cache(maxsize=None)
+def _plan(record: type) -> Tuple[Tuple[str, Optional[Converter]], ...]:
+    hints = get_type_hints(record)
+    return tuple((name, converter(hints[name], _nested)) for name in record._fields)
+
+
+def _nested(record: type) -> Converter:
+    return partial(build_record, record)
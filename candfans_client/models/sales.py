@@ -214,3 +214,16 @@ class BacknumberSale(BaseModel):
 class SalesBacknumber(BaseModel):
     total_price: int
     sales: List[BacknumberSale]
+
+
+class SalesReport(BaseModel):
+    """
+    every sales endpoint for one month
+    """
+    month: str
+    sales: List[Sales]
+    purchase_post: SalesPurchasePost
+    subscribe: SalesSubscribe
+    chip: SalesChip
+    backnumber: SalesBacknumber
+    histories: List[SalesHistory]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+def iter_pages(
+    fetch_page: Callable[[int], List[T]],
+    start_page: int = 1,
+    max_page: Optional[int] = None,
+    concurrency: int = 1,
+) -> Generator[List[T], None, None]:
+    """
+    Fetch pages until the first empty page or max_page and yield them in page order.
+    With concurrency > 1 a sliding window of pages is fetched on a thread pool.
+    """
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be >= 1 [{concurrency}]')
+    if concurrency == 1:
+        page = start_page
+        while True:
+            items = fetch_page(page)
+            if len(items) == 0:
+                break
+            yield items
+            page += 1
+            if max_page is not None and page > max_page:
+                break
+        return
+
+    last_page = None if max_page is None else max(max_page, start_page)
+    pending: Deque[Future] = deque()
+    next_page = start_page
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='candfans-page') as executor:
+        def schedule():
+            nonlocal next_page
+            while len(pending) < concurrency and (last_page is None or next_page <= last_page):
+                pending.append(executor.submit(fetch_page, next_page))
+                next_page += 1
+
+        try:
+            schedule()
+            while pending:
+                items = pending.popleft().result()
+                if len(items) == 0:
+                    break
+                yield items
+                schedule()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def aiter_pages(
+    fetch_page: Callable[[int], Awaitable[List[T]]],
+    start_page: int = 1,
+    max_page: Optional[int] = None,
+    concurrency: int = 1,
+) -> AsyncGenerator[List[T], None]:
+    """
+    Fetch a sliding window of `concurrency` pages at once and yield them in page order.
+    Stops at the first empty page and cancels the pages fetched beyond it.
+    """
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be >= 1 [{concurrency}]')
+    last_page = None if max_page is None else max(max_page, start_page)
+    pending: Deque[asyncio.Future] = deque()
+    next_page = start_page
+
+    def schedule():
+        nonlocal next_page
+        while len(pending) < concurrency and (last_page is None or next_page <= last_page):
+            pending.append(asyncio.ensure_future(fetch_page(next_page)))
+            next_page += 1
+
+    try:
+        schedule()
+        while pending:
+            items = await pending.popleft()
+            if len(items) == 0:
+                break
+            yield items
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def prefetch_pages(pages: Iterator[T], depth: int = 0) -> Generator[T, None, None]:
+    """
+    Pull up to `depth` pages ahead on a background thread while the caller consumes the current one.
+    """
+    if depth < 1:
+        yield from pages
+        return
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+            put((_DONE, None))
+        except Exception as e:
+            put((_DONE, e))
+        finally:
+            close = getattr(pages, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name='candfans-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            page, error = buffer.get()
+            if page is _DONE:
+                if error is not None:
+                    raise error
+                break
+            yield page
+    finally:
+        stopped.set()
+
+
+async def aprefetch_pages(pages: AsyncIterator[T], depth: int = 0) -> AsyncGenerator[T, None]:
+    """
+    Pull up to `depth` pages ahead on a background task while the caller consumes the current one.
+    """
+    if depth < 1:
+        async for page in pages:
+            yield page
+        return
+
+    buffer: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+    async def produce():
+        try:
+            async for page in pages:
+                await buffer.put((page, None))
+            await buffer.put((_DONE, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await buffer.put((_DONE, e))
+        finally:
+            aclose = getattr(pages, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            page, error = await buffer.get()
+            if page is _DONE:
+                if error is not None:
+                    raise error
+                break
+            yield page
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
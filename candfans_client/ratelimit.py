@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, Mapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+@dataclass
+class Bucket:
+    limit: Optional[int]
+    tokens: float
+    updated_at: float
+    blocked_until: float = 0.0
+
+
+class RateLimiter:
+    """
+    Token bucket which learns the budget from x-ratelimit-* response headers.
+
+    reserve() returns how long the caller has to wait before sending,
+    update() feeds the headers of each response back into the bucket.
+    """
+
+    def __init__(
+        self,
+        period: float = 60.0,
+        limit: Optional[int] = None,
+        margin: int = 10,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.period = period
+        self.margin = margin
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bucket = Bucket(
+            limit=limit,
+            tokens=float(self._capacity(limit)),
+            updated_at=clock(),
+        )
+
+    @property
+    def limit(self) -> Optional[int]:
+        with self._state() as bucket:
+            return bucket.limit
+
+    def reserve(self) -> float:
+        with self._state() as bucket:
+            now = self._clock()
+            self._refill(bucket, now)
+            delay = max(bucket.blocked_until - now, 0.0)
+            if bucket.limit is None:
+                # nothing learned yet, the first response will tell us the budget
+                return delay
+            if bucket.tokens < 1:
+                delay = max(delay, (1 - bucket.tokens) / self._rate(bucket.limit))
+            bucket.tokens -= 1
+            return delay
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        limit = _int_header(headers, 'x-ratelimit-limit')
+        remaining = _int_header(headers, 'x-ratelimit-remaining')
+        with self._state() as bucket:
+            now = self._clock()
+            self._refill(bucket, now)
+            if limit is not None:
+                bucket.limit = limit
+            elif remaining is not None:
+                bucket.limit = max(bucket.limit or 0, remaining + 1)
+            if remaining is not None:
+                bucket.tokens = float(min(remaining - self.margin, self._capacity(bucket.limit)))
+                reset_at = _int_header(headers, 'x-ratelimit-reset')
+                if remaining <= 0 and reset_at is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, float(reset_at))
+            retry_after = parse_retry_after(headers.get('retry-after'), now)
+            if retry_after is not None:
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+
+    @contextmanager
+    def _state(self) -> Iterator[Bucket]:
+        with self._lock:
+            yield self._bucket
+
+    def _capacity(self, limit: Optional[int]) -> int:
+        if limit is None:
+            return 0
+        return max(limit - self.margin, 1)
+
+    def _rate(self, limit: int) -> float:
+        return limit / self.period
+
+    def _refill(self, bucket: Bucket, now: float) -> None:
+        if bucket.limit is not None:
+            elapsed = max(now - bucket.updated_at, 0.0)
+            bucket.tokens = min(
+                float(self._capacity(bucket.limit)),
+                bucket.tokens + elapsed * self._rate(bucket.limit)
+            )
+        bucket.updated_at = now
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    RateLimiter whose bucket lives in a lock file, so that every process on the host
+    pointing at the same path draws from one shared budget.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        period: float = 60.0,
+        limit: Optional[int] = None,
+        margin: int = 10,
+        clock: Callable[[], float] = time.time,
+    ):
+        if fcntl is None:
+            raise RuntimeError('FileRateLimiter requires fcntl (POSIX only)')
+        self.path = path
+        super().__init__(period, limit, margin, clock)
+
+    @contextmanager
+    def _state(self) -> Iterator[Bucket]:
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    bucket = self._load(f.read())
+                    yield bucket
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(asdict(bucket)))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self, raw: str) -> Bucket:
+        try:
+            return Bucket(**json.loads(raw))
+        except (TypeError, ValueError):
+            # first user of the file (or a corrupted one) starts from our own initial state
+            return Bucket(**asdict(self._bucket))
+
+
+def parse_retry_after(value: Optional[str], now: float) -> Optional[float]:
+    """
+    Retry-After is either delta-seconds or an HTTP-date
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(retry_at.timestamp() - now, 0.0)
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import random
+import time
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import httpx
+
+from candfans_client.ratelimit import parse_retry_after
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry transient failures (timeouts, connection errors, 429 and 5xx) of idempotent requests
+    with exponential backoff and full jitter. Retry-After from the server takes precedence.
+    """
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    jitter: bool = True
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    retry_methods: Tuple[str, ...] = ('GET',)
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> bool:
+        if attempt >= self.max_attempts or method.upper() not in self.retry_methods:
+            return False
+        if error is not None:
+            return isinstance(error, httpx.TransportError)
+        return response is not None and response.status_code in self.retry_statuses
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('retry-after'), time.time())
+            if retry_after is not None:
+                return retry_after
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import os
+
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+# 401: Unauthenticated, 419: CSRF token mismatch (laravel sanctum)
+AUTH_ERROR_STATUSES = (401, 419)
+
+
+@dataclass
+class SessionState:
+    """
+    Cookies and XSRF token of a logged in session, to be reused by another process.
+    """
+    xsrf_token: Optional[str]
+    cookies: List[Dict[str, Optional[str]]] = field(default_factory=list)
+
+    @classmethod
+    def capture(cls, cookies: httpx.Cookies, xsrf_token: Optional[str]) -> SessionState:
+        return cls(
+            xsrf_token=xsrf_token,
+            cookies=[
+                {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path}
+                for c in cookies.jar
+            ],
+        )
+
+    def apply(self, cookies: httpx.Cookies) -> None:
+        for c in self.cookies:
+            cookies.set(c['name'], c['value'], domain=c['domain'] or '', path=c['path'] or '/')
+
+    def save(self, path: str) -> None:
+        # the file grants access to the account, keep it private
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(asdict(self), f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional[SessionState]:
+        try:
+            with open(path) as f:
+                return cls(**json.load(f))
+        except (OSError, TypeError, ValueError):
+            return None
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+JST = timezone(timedelta(hours=9))
+
+
+def is_closed_month(month_yyyy_mm: str, now: Optional[datetime] = None) -> bool:
+    """
+    A month is closed once it is over in Japan time
+    """
+    now = now or datetime.now(JST)
+    return month_yyyy_mm < now.astimezone(JST).strftime('%Y-%m')
+
+
+class SalesStore:
+    """
+    SQLite store of the raw `data` of sales endpoints for closed months, which never change.
+    """
+
+    def __init__(self, path: str = 'candfans_sales.sqlite3'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sales ('
+                ' endpoint TEXT NOT NULL,'
+                ' month TEXT NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' fetched_at TEXT NOT NULL,'
+                ' PRIMARY KEY (endpoint, month)'
+                ')'
+            )
+
+    def get(self, endpoint: str, month_yyyy_mm: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM sales WHERE endpoint = ? AND month = ?',
+                (endpoint, month_yyyy_mm)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def set(self, endpoint: str, month_yyyy_mm: str, data: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sales (endpoint, month, data, fetched_at) VALUES (?, ?, ?, ?)',
+                (
+                    endpoint,
+                    month_yyyy_mm,
+                    json.dumps(data, ensure_ascii=False),
+                    datetime.now(JST).isoformat(),
+                )
+            )
+
+    def delete(self, endpoint: Optional[str] = None, month_yyyy_mm: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM sales WHERE (? IS NULL OR endpoint = ?) AND (? IS NULL OR month = ?)',
+                (endpoint, endpoint, month_yyyy_mm, month_yyyy_mm)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,10 +1,13 @@
+import asyncio
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import patch
 
 from candfans_client.async_client import AsyncCandFansClient
+from candfans_client.exceptions import CandFansException
 from candfans_client.models.timeline import PostType
 from candfans_client.models.user import FollowStatus
-from tests.utils import mock_session_request
+from candfans_client.retry import RetryPolicy
+from tests.utils import mock_session_request, mock_error_response, mock_json_response
 
 
 @patch('httpx._client.AsyncClient.request', side_effect=mock_session_request)
@@ -26,6 +29,60 @@ class TestAsyncAnonymousCandFansClient(IsolatedAsyncioTestCase):
         histories = await client.get_sales_history('2023-11')
         self.assertEqual(len(histories), 2)
 
+    async def test_get_sales_history_with_concurrency(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        histories = await client.get_sales_history('2023-11', concurrency=3)
+        self.assertEqual(histories, await client.get_sales_history('2023-11'))
+
+    async def test_get_sales_history_fields(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        histories = await client.get_sales_history('2023-11', fields=('orders_id',))
+        self.assertEqual([h.orders_id for h in histories], [h.orders_id for h in await client.get_sales_history('2023-11')])
+
+    async def test_iter_sales_history(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        histories = [h async for h in client.iter_sales_history('2023-11')]
+        self.assertEqual(histories, await client.get_sales_history('2023-11'))
+
+    async def test_login_again_once_for_concurrent_rejections(self, mock_request):
+        rejected = {'get-user-mine', 'get-users'}
+
+        async def expiring_request(method, url, *arg, **kwargs):
+            # let both requests be in flight before either is rejected
+            await asyncio.sleep(0)
+            for endpoint in list(rejected):
+                if endpoint in url:
+                    rejected.discard(endpoint)
+                    return mock_error_response(419)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = expiring_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        mine_user_info, user_info = await asyncio.gather(
+            client.get_user_mine(),
+            client.get_users('dummy_user'),
+        )
+        self.assertEqual(len(mine_user_info.users), 1)
+        self.assertEqual(user_info.user.user_code, 'dummy_user')
+        login_calls = [c for c in mock_request.call_args_list if 'auth/login' in c.args[1]]
+        self.assertEqual(len(login_calls), 2)
+
     async def test_get_sales(self, *args):
         client = AsyncCandFansClient(
             email='test@test.com',
@@ -79,6 +136,65 @@ class TestAsyncAnonymousCandFansClient(IsolatedAsyncioTestCase):
         self.assertEqual(backnumber.total_price, 2800)
         self.assertEqual(backnumber.sales[0].sum_price, 2800)
 
+    async def test_get_sales_report(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        reports = await client.get_sales_report(['2023-11', '2023-11'], concurrency=3)
+        self.assertEqual(list(reports), ['2023-11'])
+        report = reports['2023-11']
+        self.assertEqual(report.sales[0].subscribe_sum, 3000)
+        self.assertEqual(report.purchase_post.total_price, 300)
+        self.assertEqual(report.subscribe.total_price, 3000)
+        self.assertEqual(report.chip.total_price, 1000)
+        self.assertEqual(report.backnumber.total_price, 2800)
+        self.assertEqual(len(report.histories), 2)
+
+    async def test_get_sales_report_cancels_in_flight_on_failure(self, mock_request):
+        cancelled = []
+
+        async def failing_request(method, url, *arg, **kwargs):
+            if 'get-sales-chip' in url:
+                return mock_error_response(404)
+            if 'api/orders' in url:
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    cancelled.append(url)
+                    raise
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = failing_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        with self.assertRaises(CandFansException):
+            await client.get_sales_report(['2023-11'], concurrency=6)
+        self.assertEqual(len(cancelled), 5)
+
+    async def test_follow_uses_xsrf_token_from_cookie_jar(self, mock_request):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+
+        def rotating_request(method, url, *arg, **kwargs):
+            if url.endswith('auth/login'):
+                client._session.cookies.set('XSRF-TOKEN', 'rotated%3D')
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = rotating_request
+        await client.login()
+        self.assertEqual(client.header['X-Xsrf-Token'], 'rotated=')
+        client._session.cookies.set('XSRF-TOKEN', 'again')
+        await client.follow(user_id=9999)
+        put_follow = [c for c in mock_request.call_args_list if 'put-follow' in c.args[1]][-1]
+        self.assertEqual(put_follow.kwargs['headers']['X-Xsrf-Token'], 'again')
+
     async def test_follows(self, *args):
         client = AsyncCandFansClient(
             email='test@test.com',
@@ -94,6 +210,32 @@ class TestAsyncAnonymousCandFansClient(IsolatedAsyncioTestCase):
         self.assertTrue(follows[1].is_follow)
         self.assertFalse(follows[1].is_official_creator)
 
+    async def test_follows_with_concurrency(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        follows = []
+        async for f in client.get_follows(999, concurrency=3):
+            follows.append(f)
+        self.assertEqual(len(follows), 2)
+        self.assertTrue(follows[0].is_official_creator)
+        self.assertFalse(follows[1].is_official_creator)
+
+    async def test_follows_with_prefetch(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        follows = []
+        async for f in client.get_follows(999, prefetch=2):
+            follows.append(f)
+        self.assertEqual(len(follows), 2)
+        self.assertTrue(follows[0].is_official_creator)
+        self.assertFalse(follows[1].is_official_creator)
+
     async def test_followed(self, *args):
         client = AsyncCandFansClient(
             email='test@test.com',
@@ -129,6 +271,103 @@ class TestAsyncAnonymousCandFansClient(IsolatedAsyncioTestCase):
         self.assertEqual(len(user_info.plans), 2)
         self.assertEqual(user_info.user.user_code, 'dummy_user')
 
+    async def test_get_users_retry_on_server_error(self, mock_request):
+        failures = [mock_error_response(502)]
+
+        def flaky_request(method, url, *arg, **kwargs):
+            if 'get-users' in url and failures:
+                return failures.pop(0)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = flaky_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password',
+            retry_policy=RetryPolicy(backoff_base=0),
+        )
+        await client.login()
+        user_info = await client.get_users('dummy_user')
+        self.assertEqual(user_info.user.user_code, 'dummy_user')
+
+    async def test_get_users_many(self, mock_request):
+        def users_request(method, url, *arg, **kwargs):
+            if url.endswith('user_code=missing'):
+                return mock_error_response(404)
+            if url.endswith('user_code=malformed'):
+                return mock_json_response({'status': 'SUCCESS', 'message': '', 'data': {'user': 'not a user'}})
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = users_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        results = {}
+        async for user_code, user_info in client.get_users_many(
+                ['malformed', 'dummy_user', 'missing', 'dummy_user'], concurrency=1
+        ):
+            results[user_code] = user_info
+        self.assertEqual(results['dummy_user'].user.user_code, 'dummy_user')
+        self.assertIsInstance(results['missing'], CandFansException)
+        self.assertIsInstance(results['malformed'], CandFansException)
+
+    async def test_coalesce_identical_requests(self, mock_request):
+        async def slow_request(method, url, *arg, **kwargs):
+            await asyncio.sleep(0)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = slow_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        user_infos = await asyncio.gather(*[client.get_users('dummy_user') for _ in range(3)])
+        self.assertTrue(all(u.user.user_code == 'dummy_user' for u in user_infos))
+        await client.get_users('dummy_user')
+        get_users_calls = [c for c in mock_request.call_args_list if 'get-users' in c.args[1]]
+        self.assertEqual(len(get_users_calls), 2)
+
+    async def test_coalesced_request_survives_one_cancelled_caller(self, mock_request):
+        release = asyncio.Event()
+
+        async def slow_request(method, url, *arg, **kwargs):
+            await release.wait()
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = slow_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        first = asyncio.ensure_future(client.get_users('dummy_user'))
+        second = asyncio.ensure_future(client.get_users('dummy_user'))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual((await second).user.user_code, 'dummy_user')
+        self.assertTrue(first.cancelled())
+
+    async def test_single_flight_after_last_caller_cancelled(self, *args):
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        release = asyncio.Event()
+
+        async def perform():
+            await release.wait()
+            return 'done'
+
+        first = asyncio.ensure_future(client._single_flight(('GET', 'key'), perform))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(client._single_flight(('GET', 'key'), perform))
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await second, 'done')
+
     async def test_get_timeline_with_public(self, *args):
         client = AsyncCandFansClient(
             email='test@test.com',
@@ -170,3 +409,23 @@ class TestAsyncAnonymousCandFansClient(IsolatedAsyncioTestCase):
             user_id=9999,
         )
         self.assertEqual(ret, FollowStatus.FOLLOWED)
+
+    async def test_follow_many(self, mock_request):
+        def follow_request(method, url, *arg, **kwargs):
+            if url.endswith('put-follow/1'):
+                return mock_error_response(500)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = follow_request
+        client = AsyncCandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        await client.login()
+        results = {}
+        async for user_id, status in client.follow_many([9999, 1], concurrency=2):
+            results[user_id] = status
+        self.assertEqual(results[9999], FollowStatus.FOLLOWED)
+        self.assertIsInstance(results[1], CandFansException)
+        csrf_calls = [c for c in mock_request.call_args_list if 'csrf-cookie' in c.args[1]]
+        self.assertEqual(len(csrf_calls), 1)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from candfans_client.cache import ResponseCache
+from tests.utils import FakeClock
+
+
+class TestResponseCache(TestCase):
+    def test_hit_and_miss(self):
+        cache = ResponseCache()
+        self.assertIsNone(cache.get('get_users', 'koma'))
+        cache.set('get_users', 'koma', 'user')
+        self.assertEqual(cache.get('get_users', 'koma'), 'user')
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.hit_rate, 0.5)
+
+    def test_ttl_per_endpoint(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttl=60, ttls={'get_creator_ranking': 10}, clock=clock)
+        cache.set('get_users', 'koma', 'user')
+        cache.set('get_creator_ranking', 1, ['creator'])
+        clock.now += 30
+        self.assertEqual(cache.get('get_users', 'koma'), 'user')
+        self.assertIsNone(cache.get('get_creator_ranking', 1))
+        clock.now += 31
+        self.assertIsNone(cache.get('get_users', 'koma'))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set('get_users', 'a', 1)
+        cache.set('get_users', 'b', 2)
+        cache.get('get_users', 'a')
+        cache.set('get_users', 'c', 3)
+        self.assertIsNone(cache.get('get_users', 'b'))
+        self.assertEqual(cache.get('get_users', 'a'), 1)
+        self.assertEqual(cache.get('get_users', 'c'), 3)
+        self.assertEqual(cache.stats.evictions, 1)
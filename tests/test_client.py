@@ -1,10 +1,28 @@
-from unittest import TestCase
+import json
+import os
+import tempfile
+from unittest import TestCase, skipIf
 from unittest.mock import patch
 
-from candfans_client.client import CandFansClient
+import httpx
+
+from candfans_client.cache import ResponseCache
+from candfans_client.client import AnonymousCandFansClient, CandFansClient
+from candfans_client.exceptions import CandFansException
+from candfans_client.intern import InternTable
+from candfans_client.models.lazy import LazyModel
+from candfans_client.models.records import PostRecord, ShortPlanRecord
 from candfans_client.models.timeline import PostType
 from candfans_client.models.user import FollowStatus
-from tests.utils import mock_session_request
+from candfans_client.retry import RetryPolicy
+from candfans_client.session import SessionState
+from candfans_client.store import SalesStore
+from tests.utils import mock_session_request, mock_error_response, mock_json_response
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 @patch('httpx._client.Client.request', side_effect=mock_session_request)
@@ -16,6 +34,51 @@ class TestClient(TestCase):
         )
         self.assertTrue(client.logged_in)
 
+    def test_login_with_saved_session(self, mock_request):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        session_path = os.path.join(directory.name, 'session.json')
+        CandFansClient(
+            email='test@test.com',
+            password='password',
+            session_path=session_path,
+        )
+        self.assertEqual(SessionState.load(session_path).xsrf_token, 'cookie')
+        mock_request.reset_mock()
+
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            session_path=session_path,
+        )
+        self.assertTrue(client.logged_in)
+        self.assertEqual(client.header['X-Xsrf-Token'], 'cookie')
+        mock_request.assert_not_called()
+
+    def test_login_again_when_saved_session_expired(self, mock_request):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        session_path = os.path.join(directory.name, 'session.json')
+        SessionState(xsrf_token='expired').save(session_path)
+        rejected = [mock_error_response(401)]
+
+        def expired_request(method, url, *arg, **kwargs):
+            if 'get-user-mine' in url and rejected:
+                return rejected.pop(0)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = expired_request
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            session_path=session_path,
+        )
+        mine_user_info = client.get_user_mine()
+        self.assertEqual(len(mine_user_info.users), 1)
+        self.assertEqual(client.header['X-Xsrf-Token'], 'cookie')
+        login_calls = [c for c in mock_request.call_args_list if 'auth/login' in c.args[1]]
+        self.assertEqual(len(login_calls), 1)
+
     def test_get_sales_history(self, *args):
         client = CandFansClient(
             email='test@test.com',
@@ -24,6 +87,78 @@ class TestClient(TestCase):
         histories = client.get_sales_history('2023-11')
         self.assertEqual(len(histories), 2)
 
+    def test_get_sales_history_with_concurrency(self, *args):
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        histories = client.get_sales_history('2023-11', concurrency=3)
+        self.assertEqual(histories, client.get_sales_history('2023-11'))
+
+    @skipIf(numpy is None, 'numpy is not installed')
+    def test_get_sales_history_frame(self, *args):
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        frame = client.get_sales_history_frame('2023-11')
+        histories = client.get_sales_history('2023-11')
+        self.assertEqual(len(frame), len(histories))
+        self.assertEqual(
+            frame.groupby_sum('plan_name')['subscribe_amount'].sum(),
+            sum(h.subscribe_amount for h in histories)
+        )
+
+    def test_iter_sales_history(self, mock_request):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            sales_store=SalesStore(os.path.join(directory.name, 'sales.sqlite3')),
+        )
+        histories = client.iter_sales_history('2023-11')
+        first = next(histories)
+        history_calls = [c for c in mock_request.call_args_list if 'get-sales-history' in c.args[1]]
+        self.assertEqual(len(history_calls), 1)
+        # the month is not stored until every page has been read
+        self.assertIsNone(client.sales_store.get('get_sales_history', '2023-11'))
+        self.assertEqual([first] + list(histories), client.get_sales_history('2023-11', refresh=True))
+        self.assertEqual(len(client.sales_store.get('get_sales_history', '2023-11')), 2)
+
+    def test_get_sales_history_login_again_mid_crawl(self, mock_request):
+        rejected = [mock_error_response(401)]
+
+        def expiring_request(method, url, *arg, **kwargs):
+            if 'get-sales-history' in url and 'page=2' in url and rejected:
+                return rejected.pop(0)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = expiring_request
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        histories = client.get_sales_history('2023-11')
+        self.assertEqual(len(histories), 2)
+        login_calls = [c for c in mock_request.call_args_list if 'auth/login' in c.args[1]]
+        self.assertEqual(len(login_calls), 2)
+
+    def test_login_rejected_is_not_retried(self, mock_request):
+        def rejecting_request(method, url, *arg, **kwargs):
+            if 'auth/login' in url:
+                return mock_error_response(401)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = rejecting_request
+        with self.assertRaises(CandFansException):
+            CandFansClient(
+                email='test@test.com',
+                password='password'
+            )
+        login_calls = [c for c in mock_request.call_args_list if 'auth/login' in c.args[1]]
+        self.assertEqual(len(login_calls), 1)
+
     def test_get_sales(self, *args):
         client = CandFansClient(
             email='test@test.com',
@@ -33,6 +168,28 @@ class TestClient(TestCase):
         self.assertEqual(len(sales), 1)
         self.assertEqual(sales[0].subscribe_sum, 3000)
 
+    def test_get_sales_with_store(self, mock_request):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            sales_store=SalesStore(os.path.join(directory.name, 'sales.sqlite3')),
+        )
+
+        def get_sales_calls():
+            return [c for c in mock_request.call_args_list if 'get-sales?' in c.args[1]]
+
+        client.get_sales('2023-11')
+        sales = client.get_sales('2023-11')
+        self.assertEqual(sales[0].subscribe_sum, 3000)
+        self.assertEqual(len(get_sales_calls()), 1)
+        client.get_sales('2023-11', refresh=True)
+        self.assertEqual(len(get_sales_calls()), 2)
+
+        histories = client.get_sales_history('2023-11')
+        self.assertEqual(client.get_sales_history('2023-11'), histories)
+
     def test_get_sales_purchase_post(self, *args):
         client = CandFansClient(
             email='test@test.com',
@@ -85,6 +242,17 @@ class TestClient(TestCase):
         self.assertTrue(follows[1].is_follow)
         self.assertFalse(follows[1].is_official_creator)
 
+    def test_follows_with_prefetch(self, *args):
+
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        follows = list(client.get_follows(999, prefetch=2))
+        self.assertEqual(len(follows), 2)
+        self.assertTrue(follows[0].is_official_creator)
+        self.assertFalse(follows[1].is_official_creator)
+
     def test_followed(self, *args):
 
         client = CandFansClient(
@@ -118,6 +286,128 @@ class TestClient(TestCase):
         self.assertEqual(len(user_info.plans), 2)
         self.assertEqual(user_info.user.user_code, 'dummy_user')
 
+    def test_get_users_with_json_loads(self, *args):
+        decoded = []
+
+        def json_loads(content):
+            decoded.append(content)
+            return json.loads(content)
+
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            json_loads=json_loads,
+        )
+        user_info = client.get_users('dummy_user')
+        self.assertEqual(user_info.user.user_code, 'dummy_user')
+        self.assertIsInstance(decoded[-1], bytes)
+
+    def test_follows_validate_from_bytes(self, *args):
+        decoded = []
+
+        def json_loads(content):
+            decoded.append(content)
+            return json.loads(content)
+
+        client = AnonymousCandFansClient(json_loads=json_loads)
+        follows = list(client.get_follows(999))
+        self.assertEqual(len(follows), 2)
+        # pages are validated from the raw bytes without going through json_loads
+        self.assertEqual(decoded, [])
+
+    def test_follows_error_status(self, mock_request):
+        def failing_request(method, url, *arg, **kwargs):
+            response = mock_session_request(method, url, *arg, **kwargs)
+            response.content = b'{"status": "ERROR", "message": "not found"}'
+            return response
+
+        mock_request.side_effect = failing_request
+        client = AnonymousCandFansClient()
+        with self.assertRaisesRegex(CandFansException, 'not found'):
+            list(client.get_follows(999))
+
+    def test_intern_table(self, *args):
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            intern_table=InternTable(),
+        )
+        first = client.get_sales_history('2023-11', compact=True)
+        second = client.get_sales_history('2023-11', compact=True)
+        self.assertIs(first[0].plan_name, second[1].plan_name)
+        self.assertIs(first[0].profile_img, second[1].profile_img)
+        self.assertIs(client.get_sales_history('2023-11')[0].plan_name, first[0].plan_name)
+
+    def test_get_users_with_cache(self, mock_request):
+
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            cache=ResponseCache(),
+        )
+        first = client.get_users('dummy_user')
+        second = client.get_users('dummy_user')
+        self.assertIs(first, second)
+        get_users_calls = [c for c in mock_request.call_args_list if 'get-users' in c.args[1]]
+        self.assertEqual(len(get_users_calls), 1)
+        self.assertEqual(client.cache.stats.hits, 1)
+
+    def test_get_users_retry_on_server_error(self, mock_request):
+        failures = [mock_error_response(503), mock_error_response(429, {'retry-after': '0'})]
+
+        def flaky_request(method, url, *arg, **kwargs):
+            if 'get-users' in url and failures:
+                return failures.pop(0)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = flaky_request
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            retry_policy=RetryPolicy(backoff_base=0),
+        )
+        user_info = client.get_users('dummy_user')
+        self.assertEqual(user_info.user.user_code, 'dummy_user')
+
+    def test_get_users_give_up_after_max_attempts(self, mock_request):
+        def failing_request(method, url, *arg, **kwargs):
+            if 'get-users' in url:
+                return mock_error_response(503)
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = failing_request
+        client = CandFansClient(
+            email='test@test.com',
+            password='password',
+            retry_policy=RetryPolicy(max_attempts=2, backoff_base=0),
+        )
+        with self.assertRaises(CandFansException):
+            client.get_users('dummy_user')
+        get_users_calls = [c for c in mock_request.call_args_list if 'get-users' in c.args[1]]
+        self.assertEqual(len(get_users_calls), 2)
+
+    def test_get_users_many(self, mock_request):
+        def users_request(method, url, *arg, **kwargs):
+            if url.endswith('user_code=missing'):
+                return mock_error_response(404)
+            if url.endswith('user_code=malformed'):
+                return mock_json_response({'status': 'SUCCESS', 'message': '', 'data': {'user': 'not a user'}})
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = users_request
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        results = dict(client.get_users_many(
+            ['malformed', 'dummy_user', 'missing', 'dummy_user'], concurrency=1
+        ))
+        self.assertEqual(results['dummy_user'].user.user_code, 'dummy_user')
+        self.assertIsInstance(results['missing'], CandFansException)
+        self.assertIsInstance(results['malformed'], CandFansException)
+        get_users_calls = [c for c in mock_request.call_args_list if 'get-users' in c.args[1]]
+        self.assertEqual(len(get_users_calls), 3)
+
     def test_get_timeline_with_public(self, *args):
 
         client = CandFansClient(
@@ -145,6 +435,69 @@ class TestClient(TestCase):
         self.assertEqual(len(posts), 2)
         self.assertEqual(posts[0].plans[0].plan_id, 123)
 
+    def test_get_timeline_fields(self, *args):
+        client = AnonymousCandFansClient()
+        posts = list(client.get_timeline(
+            user_id=9999,
+            post_types=[PostType.LIMITED_ACCESS_ITEM],
+            month='2024-02',
+            fields=('post_id', 'like_cnt', 'comments_cnt'),
+        ))
+        self.assertEqual(len(posts), 2)
+        self.assertEqual(posts[0]._fields, ('post_id', 'like_cnt', 'comments_cnt'))
+        self.assertIsInstance(posts[0].post_id, int)
+
+    def test_fields(self, *args):
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        follows = list(client.get_follows(999, fields=['user_code']))
+        self.assertEqual([f.user_code for f in follows], [f.user_code for f in client.get_follows(999)])
+        histories = client.get_sales_history('2023-11', fields=('orders_id', 'subscribe_amount'))
+        self.assertEqual(
+            histories,
+            [(h.orders_id, h.subscribe_amount) for h in client.get_sales_history('2023-11')]
+        )
+        with self.assertRaises(ValueError):
+            list(client.get_followed(999, fields=('no_such_field',)))
+
+    def test_get_timeline_compact(self, *args):
+        client = AnonymousCandFansClient()
+        posts = list(client.get_timeline(
+            user_id=9999,
+            post_types=[PostType.LIMITED_ACCESS_ITEM],
+            month='2024-02',
+            compact=True,
+        ))
+        self.assertEqual(len(posts), 2)
+        self.assertIsInstance(posts[0], PostRecord)
+        self.assertIsInstance(posts[0].plans[0], ShortPlanRecord)
+        self.assertEqual(posts[0].plans[0].plan_id, 123)
+
+    def test_compact(self, *args):
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        follows = list(client.get_follows(999, compact=True))
+        self.assertEqual([f._asdict() for f in follows], [f.model_dump() for f in client.get_follows(999)])
+        histories = client.get_sales_history('2023-11', compact=True)
+        self.assertEqual([h._asdict() for h in histories], [h.model_dump() for h in client.get_sales_history('2023-11')])
+
+    def test_get_timeline_lazy(self, *args):
+        client = AnonymousCandFansClient()
+        posts = list(client.get_timeline(
+            user_id=9999,
+            post_types=[PostType.LIMITED_ACCESS_ITEM],
+            month='2024-02',
+            lazy=True,
+        ))
+        self.assertEqual(len(posts), 2)
+        self.assertIsInstance(posts[0], LazyModel)
+        self.assertEqual(posts[0].plans[0].plan_id, 123)
+        self.assertIsInstance(posts[0].post_id, int)
+
     def test_follow(self, *args):
 
         client = CandFansClient(
@@ -155,3 +508,45 @@ class TestClient(TestCase):
             user_id=9999,
         )
         self.assertEqual(ret, FollowStatus.FOLLOWED)
+
+    def test_follow_reuses_xsrf_token(self, mock_request):
+
+        client = CandFansClient(
+            email='test@test.com',
+            password='password'
+        )
+        client.follow(user_id=9999)
+        client.follow(user_id=9999)
+        csrf_calls = [c for c in mock_request.call_args_list if 'csrf-cookie' in c.args[1]]
+        self.assertEqual(len(csrf_calls), 1)
+
+    def test_follow_uses_xsrf_token_from_cookie_jar(self, mock_request):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        session_path = os.path.join(directory.name, 'session.json')
+
+        def rotating_request(method, url, *arg, **kwargs):
+            # the login response rotates the token, as a regenerated session does
+            if url.endswith('auth/login'):
+                client_session.cookies.set('XSRF-TOKEN', 'rotated%3D')
+            return mock_session_request(method, url, *arg, **kwargs)
+
+        mock_request.side_effect = rotating_request
+        client_session = httpx.Client()
+        with patch('httpx.Client', return_value=client_session):
+            client = CandFansClient(
+                email='test@test.com',
+                password='password',
+                session_path=session_path,
+            )
+        self.assertEqual(SessionState.load(session_path).xsrf_token, 'rotated=')
+        client.follow(user_id=9999)
+        put_follow = [c for c in mock_request.call_args_list if 'put-follow' in c.args[1]][-1]
+        self.assertEqual(put_follow.kwargs['headers']['X-Xsrf-Token'], 'rotated=')
+
+        client_session.cookies.set('XSRF-TOKEN', 'again')
+        client.follow(user_id=9999)
+        put_follow = [c for c in mock_request.call_args_list if 'put-follow' in c.args[1]][-1]
+        self.assertEqual(put_follow.kwargs['headers']['X-Xsrf-Token'], 'again')
+        csrf_calls = [c for c in mock_request.call_args_list if 'csrf-cookie' in c.args[1]]
+        self.assertEqual(len(csrf_calls), 1)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from unittest import TestCase
+
+from candfans_client.models.construct import converter, parse_datetime
+from candfans_client.models.sales import PurchaseSale
+
+
+class TestConstruct(TestCase):
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime('2023-11-29 23:44:41'), datetime(2023, 11, 29, 23, 44, 41))
+        sale = PurchaseSale(content='', post_id=1, created_at='2023-12-29T00:00:00.000000Z', sum_price=0, sum_cnt=0)
+        self.assertEqual(parse_datetime('2023-12-29T00:00:00.000000Z'), sale.created_at)
+
+        self.assertIs(parse_datetime(sale.created_at), sale.created_at)
+
+    def test_converter(self):
+        def nested(model):
+            return lambda value: (model.__name__, value)
+
+        self.assertIsNone(converter(Optional[int], nested))
+        self.assertIsNone(converter(List[str], nested))
+        self.assertIs(converter(Optional[bool], nested), bool)
+        convert = converter(Tuple[PurchaseSale, ...], nested)
+        self.assertEqual(convert([1, None]), (('PurchaseSale', 1), None))
+        self.assertEqual(converter(List[datetime], nested)(['2023-11-29 23:44:41']), [datetime(2023, 11, 29, 23, 44, 41)])
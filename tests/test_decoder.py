@@ -0,0 +1,45 @@
+import json
+
+from unittest import TestCase, skipIf
+
+from candfans_client.decoder import default_json_loads, msgspec_loads, orjson_loads, stdlib_loads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+BODY = json.dumps({'status': 'SUCCESS', 'data': [{'user_code': 'ユーザー', 'price': 1.5}]}).encode()
+
+
+class TestDecoder(TestCase):
+    def test_default_prefers_installed_decoder(self):
+        loads = default_json_loads()
+        self.assertEqual(loads(BODY), json.loads(BODY))
+        if orjson is not None:
+            self.assertIs(loads, orjson.loads)
+
+    def test_stdlib(self):
+        loads = stdlib_loads()
+        self.assertEqual(loads(BODY), json.loads(BODY))
+        with self.assertRaises(ValueError):
+            loads(b'')
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson(self):
+        loads = orjson_loads()
+        self.assertEqual(loads(BODY), json.loads(BODY))
+        with self.assertRaises(ValueError):
+            loads(b'<html>')
+
+    @skipIf(msgspec is None, 'msgspec is not installed')
+    def test_msgspec(self):
+        loads = msgspec_loads()
+        self.assertEqual(loads(BODY), json.loads(BODY))
+        with self.assertRaises(ValueError):
+            loads(b'<html>')
@@ -0,0 +1,209 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from unittest import IsolatedAsyncioTestCase, TestCase, skipIf
+
+from candfans_client.export import (
+    aexport_csv, aexport_jsonl, aiter_record_batches, arrow_schema, awrite_arrow, awrite_parquet, export_csv,
+    export_jsonl, iter_record_batches, write_arrow, write_parquet
+)
+from candfans_client.models.lazy import LazyModel
+from candfans_client.models.records import PostRecord, SalesHistoryRecord, build_record
+from candfans_client.models.sales import SalesHistory
+from candfans_client.models.timeline import Post
+from candfans_client.models.user import User
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def load(name):
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(f'{current_dir}/data/GET_https%3A%2F%2Fcandfans.jp%2Fapi%2F{name}.json') as f:
+        return json.load(f)['data']
+
+
+async def agen(rows):
+    for row in rows:
+        yield row
+
+
+@skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestExport(TestCase):
+    def test_schema(self):
+        schema = arrow_schema(SalesHistory)
+        self.assertEqual(schema.names, list(SalesHistory.model_fields))
+        self.assertEqual(schema.field('sales_date').type, pyarrow.timestamp('us'))
+        self.assertEqual(schema.field('orders_id').type, pyarrow.int64())
+        post = arrow_schema(Post)
+        self.assertEqual(post.field('attachment_length').type, pyarrow.float64())
+        self.assertEqual(post.field('plans').type.value_type.field('is_joined_plan').type, pyarrow.bool_())
+
+    def test_record_batches(self):
+        rows = load('orders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1') * 5
+        batches = list(iter_record_batches(rows, SalesHistory, batch_size=3))
+        self.assertEqual([b.num_rows for b in batches], [3] * (len(rows) // 3) + [len(rows) % 3] * bool(len(rows) % 3))
+        table = pyarrow.Table.from_batches(batches)
+        models = [SalesHistory(**r) for r in rows]
+        self.assertEqual(table.column('sales_date').to_pylist(), [m.sales_date.replace(tzinfo=None) for m in models])
+        self.assertEqual(
+            pyarrow.Table.from_batches(iter_record_batches(models, SalesHistory)).to_pylist(), table.to_pylist()
+        )
+
+    def test_record_batches_from_lazy(self):
+        rows = load('orders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1')
+        lazy = [LazyModel(SalesHistory, r) for r in rows]
+        self.assertEqual(
+            pyarrow.Table.from_batches(iter_record_batches(lazy, SalesHistory)).to_pylist(),
+            pyarrow.Table.from_batches(iter_record_batches(rows, SalesHistory)).to_pylist(),
+        )
+
+    def test_write_parquet(self):
+        rows = load('user%2Fget-follow%2F999%3Fpage%3D1')
+        sink = io.BytesIO()
+        self.assertEqual(write_parquet([User(**r) for r in rows], User, sink, row_group_size=1), len(rows))
+        sink.seek(0)
+        parquet = pyarrow.parquet.ParquetFile(sink)
+        self.assertEqual(parquet.metadata.num_row_groups, len(rows))
+        self.assertEqual(parquet.read().column('user_code').to_pylist(), [r['user_code'] for r in rows])
+
+    def test_write_arrow(self):
+        post = {
+            'month': '2024-01', 'post_id': 1, 'user_id': 2, 'user_code': 'u', 'username': 'n', 'profile_img': '',
+            'profile_cover_img': '', 'post_date': '2024-01-01', 'contents_type': 1, 'post_type': 0, 'title': '',
+            'contents_text': '', 'over_contents_50str': 0, 'price': 0, 'limit_post_date': '',
+            'reserve_post_date': '', 'contents_path1': '', 'contents_path2': '', 'contents_path3': '',
+            'contents_path4': '', 'image_count': 0, 'movie_time': None, 'secret_file': '', 'thumbnail_file': None,
+            'like_cnt': 0, 'comments_cnt': 0, 'is_like': 0, 'can_browsing': 1, 'can_send_chip': 1,
+            'apply_status': 0, 'is_progressed': 0, 'is_accept_comment': 1, 'can_read_text': 1,
+            'is_official_creator': 0, 'has_own_thumbnail': 0, 'is_on_air': 0, 'live_url': '', 'audio_time': None,
+            'sample_time': None, 'share_count': 0, 'plans': [], 'attachments': [{'default': 'a', 'low': None}],
+            'attachment_length': 1,
+        }
+        sink = io.BytesIO()
+        self.assertEqual(write_arrow([post, build_record(PostRecord, post)], Post, sink), 2)
+        table = pyarrow.ipc.open_file(io.BytesIO(sink.getvalue())).read_all()
+        self.assertEqual(table.column('attachments').to_pylist(), [[{'default': 'a', 'low': None}]] * 2)
+        self.assertEqual(table.column('can_browsing').to_pylist(), [True, True])
+
+
+@skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestAsyncExport(IsolatedAsyncioTestCase):
+    async def test_record_batches(self):
+        rows = load('orders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1') * 3
+        batches = [b async for b in aiter_record_batches(agen(rows), SalesHistory, batch_size=2)]
+        self.assertEqual(
+            pyarrow.Table.from_batches(batches).to_pylist(),
+            pyarrow.Table.from_batches(iter_record_batches(rows, SalesHistory)).to_pylist(),
+        )
+
+    async def test_write_parquet(self):
+        rows = load('user%2Fget-follow%2F999%3Fpage%3D1')
+        sink = io.BytesIO()
+        self.assertEqual(await awrite_parquet(agen(rows), User, sink, row_group_size=1), len(rows))
+        sink.seek(0)
+        parquet = pyarrow.parquet.ParquetFile(sink)
+        self.assertEqual(parquet.metadata.num_row_groups, len(rows))
+        self.assertEqual(parquet.read().column('user_code').to_pylist(), [r['user_code'] for r in rows])
+
+    async def test_write_arrow(self):
+        rows = load('user%2Fget-follow%2F999%3Fpage%3D1')
+        sink = io.BytesIO()
+        self.assertEqual(await awrite_arrow(agen(LazyModel(User, r) for r in rows), User, sink), len(rows))
+        table = pyarrow.ipc.open_file(io.BytesIO(sink.getvalue())).read_all()
+        self.assertEqual(table.column('user_code').to_pylist(), [r['user_code'] for r in rows])
+
+
+class TestExportLines(TestCase):
+    def test_export_jsonl(self):
+        rows = load('user%2Fget-follow%2F999%3Fpage%3D1')
+        for background in (True, False):
+            sink = io.BytesIO()
+            count = export_jsonl((User(**r) for r in rows), sink, background=background, chunk_size=1)
+            self.assertEqual(count, len(rows))
+            lines = sink.getvalue().decode('utf-8').splitlines()
+            self.assertEqual([json.loads(line) for line in lines], [User(**r).model_dump(mode='json') for r in rows])
+
+    def test_export_jsonl_gzip(self):
+        rows = load('orders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sales.jsonl.gz')
+            self.assertEqual(export_jsonl([build_record(SalesHistoryRecord, r) for r in rows], path), len(rows))
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                got = [json.loads(line) for line in f]
+        self.assertEqual([g['orders_id'] for g in got], [r['orders_id'] for r in rows])
+        self.assertEqual(got[0]['sales_date'], SalesHistory(**rows[0]).sales_date.isoformat())
+
+    def test_export_csv(self):
+        rows = load('orders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1') * 3
+        sink = io.BytesIO()
+        self.assertEqual(export_csv(rows, sink, columns=['orders_id', 'plan_name'], chunk_size=2), len(rows))
+        got = list(csv.reader(io.StringIO(sink.getvalue().decode('utf-8'))))
+        self.assertEqual(got[0], ['orders_id', 'plan_name'])
+        self.assertEqual(got[1:], [[str(r['orders_id']), r['plan_name']] for r in rows])
+
+        sink = io.BytesIO()
+        self.assertEqual(export_csv([], sink, columns=['orders_id']), 0)
+        self.assertEqual(sink.getvalue(), b'orders_id\r\n')
+
+    def test_export_lazy(self):
+        rows = load('user%2Fget-follow%2F999%3Fpage%3D1')
+        sink = io.BytesIO()
+        self.assertEqual(export_jsonl((LazyModel(User, r) for r in rows), sink), len(rows))
+        self.assertEqual([json.loads(line) for line in sink.getvalue().decode('utf-8').splitlines()], rows)
+
+        sink = io.BytesIO()
+        self.assertEqual(export_csv((LazyModel(User, r) for r in rows), sink, columns=['user_code']), len(rows))
+        got = list(csv.reader(io.StringIO(sink.getvalue().decode('utf-8'))))
+        self.assertEqual(got, [['user_code']] + [[r['user_code']] for r in rows])
+
+    def test_writer_error(self):
+        class Broken(io.BytesIO):
+            def write(self, data):
+                raise OSError('disk full')
+
+        with self.assertRaises(OSError):
+            export_jsonl(({'i': i} for i in range(100)), Broken(), chunk_size=1)
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            export_jsonl([], io.BytesIO(), compression='lz4')
+
+
+class TestAsyncExportLines(IsolatedAsyncioTestCase):
+    async def test_export_jsonl(self):
+        rows = load('user%2Fget-follow%2F999%3Fpage%3D1')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'followed.jsonl.gz')
+            count = await aexport_jsonl(agen(LazyModel(User, r) for r in rows), path, chunk_size=1)
+            self.assertEqual(count, len(rows))
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.assertEqual([json.loads(line) for line in f], rows)
+
+    async def test_export_csv(self):
+        rows = load('orders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1') * 3
+        sink = io.BytesIO()
+        count = await aexport_csv(agen(SalesHistory(**r) for r in rows), sink, columns=['orders_id'], chunk_size=2)
+        self.assertEqual(count, len(rows))
+        got = list(csv.reader(io.StringIO(sink.getvalue().decode('utf-8'))))
+        self.assertEqual(got, [['orders_id']] + [[str(r['orders_id'])] for r in rows])
+
+    async def test_export_csv_empty(self):
+        sink = io.BytesIO()
+        self.assertEqual(await aexport_csv(agen([]), sink, columns=['orders_id']), 0)
+        self.assertEqual(sink.getvalue(), b'orders_id\r\n')
+
+    async def test_writer_error(self):
+        class Broken(io.BytesIO):
+            def write(self, data):
+                raise OSError('disk full')
+
+        with self.assertRaises(OSError):
+            await aexport_jsonl(agen({'i': i} for i in range(100)), Broken(), chunk_size=1)
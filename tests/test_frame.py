@@ -0,0 +1,63 @@
+import json
+import os
+
+from collections import defaultdict
+from unittest import TestCase, skipIf
+
+from candfans_client.frame import SalesHistoryFrame
+from candfans_client.models.sales import SalesHistory
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def rows():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    name = 'GET_https%3A%2F%2Fcandfans.jp%2Fapi%2Forders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1'
+    with open(f'{current_dir}/data/{name}.json') as f:
+        base = json.load(f)['data'][0]
+    result = []
+    for i in range(10):
+        row = dict(base)
+        row['orders_id'] = i
+        row['plan_name'] = f'plan{i % 3}'
+        row['sales_date'] = f'2023-11-{1 + i % 2:02d} 12:00:{i:02d}'
+        row['subscribe_amount'] = 100 * i
+        result.append(row)
+    return result
+
+
+@skipIf(numpy is None, 'numpy is not installed')
+class TestSalesHistoryFrame(TestCase):
+    def test_from_rows(self):
+        data = rows()
+        frame = SalesHistoryFrame.from_rows(data, chunk_size=4)
+        self.assertEqual(len(frame), 10)
+        self.assertEqual(frame.codes('orders_id').tolist(), list(range(10)))
+        self.assertEqual(frame.column('plan_name').tolist(), [r['plan_name'] for r in data])
+        self.assertEqual(frame.categories('plan_name'), ['plan0', 'plan1', 'plan2'])
+        self.assertEqual(str(frame.column('sales_date').dtype), 'datetime64[s]')
+        models = SalesHistoryFrame.from_rows([SalesHistory(**r) for r in data])
+        self.assertEqual(models.column('sales_date').tolist(), frame.column('sales_date').tolist())
+
+    def test_groupby_sum(self):
+        data = rows()
+        frame = SalesHistoryFrame.from_rows(data)
+        expected = defaultdict(int)
+        for r in data:
+            expected[(r['sales_date'][:10], r['plan_name'])] += r['subscribe_amount']
+
+        result = frame.groupby_sum(['day', 'plan_name'], ['subscribe_amount'])
+        got = {
+            (str(day), plan): amount
+            for day, plan, amount in zip(result['day'], result['plan_name'], result['subscribe_amount'])
+        }
+        self.assertEqual(got, dict(expected))
+        self.assertEqual(frame.groupby_sum('plan_name')['affiliate_amount'].tolist(), [0, 0, 0])
+
+    def test_empty(self):
+        frame = SalesHistoryFrame.from_rows([])
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(frame.groupby_sum('user_id')['subscribe_amount'].tolist(), [])
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from candfans_client.intern import InternTable
+
+
+class TestInternTable(TestCase):
+    def test_shares_equal_strings(self):
+        table = InternTable()
+        first = ''.join(['pl', 'an'])
+        second = ''.join(['pl', 'an'])
+        self.assertIsNot(first, second)
+        self.assertIs(table(first), first)
+        self.assertIs(table(second), first)
+        self.assertEqual(len(table), 1)
+
+    def test_oldest_entries_are_evicted(self):
+        table = InternTable(maxsize=2)
+        for value in ('a', 'b', 'c'):
+            table(value)
+        self.assertEqual(len(table), 2)
+        fresh = ''.join(['a', ''])
+        self.assertIs(table(fresh), fresh)
+
+    def test_intern_fields(self):
+        table = InternTable()
+        plan = table(''.join(['pl', 'an']))
+        item = {'plan_name': ''.join(['pl', 'an']), 'plan_id': 1, 'backnumber_plan_name': None}
+        table.intern_fields(item, ('plan_name', 'plan_id', 'backnumber_plan_name'))
+        self.assertIs(item['plan_name'], plan)
+        self.assertEqual(item['plan_id'], 1)
+        self.assertIsNone(item['backnumber_plan_name'])
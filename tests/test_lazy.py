@@ -0,0 +1,65 @@
+from typing import List, Optional
+from unittest import TestCase
+
+from pydantic import BaseModel, ValidationError
+
+from candfans_client.models.lazy import LazyModel
+from candfans_client.models.timeline import ShortPlan
+
+
+class Item(BaseModel):
+    item_id: int
+    is_public: bool
+    plans: List[ShortPlan]
+    note: Optional[str] = None
+
+
+class Scalars(BaseModel):
+    count: int
+    ratio: float
+    name: Optional[str]
+
+
+PLAN = {
+    'plan_id': 1,
+    'support_price': 500,
+    'total_support_price': 550,
+    'plan_name': 'plan',
+    'plan_detail': '',
+    'backnumber_id': None,
+    'backnumber_price': None,
+    'total_backnumber_price': None,
+    'can_see_backnumber_plan_pay': False,
+    'can_buy_backnumber_not_entry_plan': False,
+    'add_backnumber_date': None,
+    'is_joined_plan': True,
+}
+
+
+class TestLazyModel(TestCase):
+    def test_fields_are_validated_on_access(self):
+        item = LazyModel(Item, {'item_id': '1', 'is_public': 1, 'plans': [PLAN]})
+        self.assertEqual(item.item_id, 1)
+        self.assertIs(item.is_public, True)
+        self.assertIsInstance(item.plans[0], ShortPlan)
+        self.assertIs(item.plans, item.plans)
+        self.assertIsNone(item.note)
+        self.assertEqual(item.to_model(), Item(item_id=1, is_public=True, plans=[PLAN]))
+
+    def test_broken_field_fails_only_when_read(self):
+        item = LazyModel(Item, {'item_id': 1, 'is_public': 'maybe'})
+        self.assertEqual(item.item_id, 1)
+        with self.assertRaises(ValidationError):
+            item.is_public
+        with self.assertRaises(AttributeError):
+            item.plans
+        with self.assertRaises(AttributeError):
+            item.unknown
+
+    def test_plain_scalars_skip_validation(self):
+        name = 'a' * 100
+        item = LazyModel(Scalars, {'count': True, 'ratio': 1, 'name': name})
+        self.assertIs(item.name, name)
+        self.assertIs(type(item.count), int)
+        self.assertIs(type(item.ratio), float)
+        self.assertIsNone(LazyModel(Scalars, {'name': None}).name)
@@ -0,0 +1,27 @@
+import json
+import os
+
+from unittest import TestCase
+
+from pydantic import ValidationError
+
+from candfans_client.models.page import page_adapter
+from candfans_client.models.user import User
+
+
+class TestPage(TestCase):
+    def test_adapter_is_cached(self):
+        self.assertIs(page_adapter(User), page_adapter(User))
+
+    def test_validate_json(self):
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        path = f'{current_dir}/data/GET_https%3A%2F%2Fcandfans.jp%2Fapi%2Fuser%2Fget-follow%2F999%3Fpage%3D1.json'
+        with open(path, 'rb') as f:
+            content = f.read()
+        page = page_adapter(User).validate_json(content)
+        self.assertEqual(page.status, 'SUCCESS')
+        self.assertEqual(page.data, [User(**u) for u in json.loads(content)['data']])
+
+    def test_invalid_envelope(self):
+        with self.assertRaises(ValidationError):
+            page_adapter(User).validate_json(b'{"status": "ERROR", "message": "error"}')
@@ -0,0 +1,70 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from candfans_client.ratelimit import FileRateLimiter, RateLimiter, parse_retry_after
+from tests.utils import FakeClock
+
+
+class TestRateLimiter(TestCase):
+    def test_no_wait_before_budget_is_known(self):
+        limiter = RateLimiter(clock=FakeClock())
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertIsNone(limiter.limit)
+
+    def test_learn_limit_from_headers(self):
+        limiter = RateLimiter(clock=FakeClock())
+        limiter.update({'x-ratelimit-limit': '60', 'x-ratelimit-remaining': '59'})
+        self.assertEqual(limiter.limit, 60)
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_paces_when_remaining_is_low(self):
+        clock = FakeClock()
+        limiter = RateLimiter(period=60, margin=10, clock=clock)
+        limiter.update({'x-ratelimit-limit': '60', 'x-ratelimit-remaining': '10'})
+        # 1 request per second, not a flat stall
+        self.assertAlmostEqual(limiter.reserve(), 1.0)
+        self.assertAlmostEqual(limiter.reserve(), 2.0)
+        clock.now += 2
+        self.assertAlmostEqual(limiter.reserve(), 1.0)
+
+    def test_infer_limit_from_remaining_only(self):
+        limiter = RateLimiter(clock=FakeClock())
+        limiter.update({'x-ratelimit-remaining': '59'})
+        self.assertEqual(limiter.limit, 60)
+
+    def test_retry_after_blocks(self):
+        limiter = RateLimiter(clock=FakeClock())
+        limiter.update({'x-ratelimit-limit': '60', 'x-ratelimit-remaining': '0', 'retry-after': '30'})
+        self.assertGreaterEqual(limiter.reserve(), 30)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('5', 0), 5)
+        self.assertIsNone(parse_retry_after(None, 0))
+        self.assertIsNone(parse_retry_after('soon', 0))
+        self.assertEqual(parse_retry_after('Thu, 01 Jan 1970 00:01:00 GMT', 30), 30)
+
+
+class TestFileRateLimiter(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ratelimit.json')
+
+    def test_share_budget_between_limiters(self):
+        clock = FakeClock()
+        first = FileRateLimiter(self.path, period=60, margin=10, clock=clock)
+        second = FileRateLimiter(self.path, period=60, margin=10, clock=clock)
+        first.update({'x-ratelimit-limit': '60', 'x-ratelimit-remaining': '12'})
+        self.assertEqual(second.limit, 60)
+        self.assertEqual(first.reserve(), 0)
+        self.assertEqual(second.reserve(), 0)
+        # both tokens above the margin are used up, so the next one has to wait
+        self.assertAlmostEqual(first.reserve(), 1.0)
+
+    def test_recover_from_corrupted_file(self):
+        with open(self.path, 'w') as f:
+            f.write('broken')
+        limiter = FileRateLimiter(self.path, clock=FakeClock())
+        self.assertIsNone(limiter.limit)
+        self.assertEqual(limiter.reserve(), 0)
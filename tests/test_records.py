@@ -0,0 +1,31 @@
+import json
+import os
+
+from unittest import TestCase
+
+from candfans_client.models.records import RECORD_TYPES, SalesHistoryRecord, UserRecord, build_record
+from candfans_client.models.sales import SalesHistory
+from candfans_client.models.user import User
+
+
+def load(name: str):
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(f'{current_dir}/data/{name}.json') as f:
+        return json.load(f)['data']
+
+
+class TestRecords(TestCase):
+    def test_records_mirror_models(self):
+        for model, record in RECORD_TYPES.items():
+            self.assertEqual(set(record._fields), set(model.model_fields), model.__name__)
+
+    def test_build_record(self):
+        for model, record, name in [
+            (SalesHistory, SalesHistoryRecord,
+             'GET_https%3A%2F%2Fcandfans.jp%2Fapi%2Forders%2Fget-sales-history%3Fmonth%3D2023-11%26page%3D1'),
+            (User, UserRecord, 'GET_https%3A%2F%2Fcandfans.jp%2Fapi%2Fuser%2Fget-follow%2F999%3Fpage%3D1'),
+        ]:
+            for data in load(name):
+                built = build_record(record, data)
+                self.assertEqual(built._asdict(), model(**data).model_dump())
+                self.assertFalse(hasattr(built, '__dict__'))
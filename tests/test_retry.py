@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+import httpx
+
+from candfans_client.retry import RetryPolicy
+from tests.utils import mock_error_response
+
+
+class TestRetryPolicy(TestCase):
+    def test_retry_transient_status_of_get(self):
+        policy = RetryPolicy(max_attempts=3)
+        self.assertTrue(policy.should_retry('GET', 1, response=mock_error_response(503)))
+        self.assertTrue(policy.should_retry('GET', 2, response=mock_error_response(429)))
+        self.assertFalse(policy.should_retry('GET', 3, response=mock_error_response(503)))
+        self.assertFalse(policy.should_retry('GET', 1, response=mock_error_response(404)))
+
+    def test_no_retry_for_non_idempotent_method(self):
+        policy = RetryPolicy()
+        self.assertFalse(policy.should_retry('POST', 1, response=mock_error_response(503)))
+        self.assertFalse(policy.should_retry('PUT', 1, error=httpx.ReadTimeout('timeout')))
+
+    def test_retry_transport_error(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry('GET', 1, error=httpx.ReadTimeout('timeout')))
+        self.assertFalse(policy.should_retry('GET', 1, error=ValueError('other')))
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_base=1, backoff_max=5, jitter=False)
+        self.assertEqual(policy.backoff(1), 1)
+        self.assertEqual(policy.backoff(3), 4)
+        self.assertEqual(policy.backoff(10), 5)
+        jittered = RetryPolicy(backoff_base=1, backoff_max=5)
+        self.assertLessEqual(jittered.backoff(3), 4)
+
+    def test_backoff_respects_retry_after(self):
+        policy = RetryPolicy(backoff_base=1, jitter=False)
+        self.assertEqual(policy.backoff(1, mock_error_response(429, {'retry-after': '7'})), 7)
@@ -0,0 +1,33 @@
+import os
+import stat
+import tempfile
+from unittest import TestCase
+
+import httpx
+
+from candfans_client.session import SessionState
+
+
+class TestSessionState(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'session.json')
+
+    def test_save_and_load(self):
+        cookies = httpx.Cookies()
+        cookies.set('candfans_session', 'session-value', domain='candfans.jp')
+        SessionState.capture(cookies, 'token').save(self.path)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+        state = SessionState.load(self.path)
+        self.assertEqual(state.xsrf_token, 'token')
+        restored = httpx.Cookies()
+        state.apply(restored)
+        self.assertEqual(restored.get('candfans_session', domain='candfans.jp'), 'session-value')
+
+    def test_load_missing_or_broken(self):
+        self.assertIsNone(SessionState.load(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{')
+        self.assertIsNone(SessionState.load(self.path))
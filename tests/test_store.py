@@ -0,0 +1,32 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from candfans_client.store import JST, SalesStore, is_closed_month
+
+
+class TestSalesStore(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = SalesStore(os.path.join(directory.name, 'sales.sqlite3'))
+        self.addCleanup(self.store.close)
+
+    def test_set_and_get(self):
+        self.assertIsNone(self.store.get('get_sales', '2023-11'))
+        self.store.set('get_sales', '2023-11', [{'subscribe_sum': 3000}])
+        self.assertEqual(self.store.get('get_sales', '2023-11'), [{'subscribe_sum': 3000}])
+
+    def test_delete(self):
+        self.store.set('get_sales', '2023-11', [])
+        self.store.set('get_sales_chip', '2023-11', {})
+        self.store.delete(endpoint='get_sales')
+        self.assertIsNone(self.store.get('get_sales', '2023-11'))
+        self.assertEqual(self.store.get('get_sales_chip', '2023-11'), {})
+
+    def test_is_closed_month(self):
+        now = datetime(2024, 1, 1, 0, 30, tzinfo=JST)
+        self.assertTrue(is_closed_month('2023-12', now))
+        self.assertFalse(is_closed_month('2024-01', now))
+        self.assertFalse(is_closed_month('2024-02', now))
@@ -10,6 +10,35 @@ def mock_session_request(method, url, *arg, **kwargs):
         ret = f.read()
     mock_response = MagicMock()
     mock_response.status_code = 200
+    mock_response.headers = {}
     mock_response.cookies = {'XSRF-TOKEN': 'cookie'}
+    mock_response.content = ret.encode() if ret else b'{}'
     mock_response.json.return_value = json.loads(ret) if ret else {}
     return mock_response
+
+
+def mock_json_response(body):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.headers = {}
+    mock_response.cookies = {}
+    mock_response.content = json.dumps(body).encode()
+    mock_response.json.return_value = body
+    return mock_response
+
+
+def mock_error_response(status_code, headers=None):
+    mock_response = MagicMock()
+    mock_response.status_code = status_code
+    mock_response.headers = headers or {}
+    mock_response.content = b''
+    mock_response.json.side_effect = ValueError('no json body')
+    return mock_response
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now